@@ -7,16 +7,20 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Annotated, Iterable, Mapping, Optional
+from typing import Annotated, AsyncIterator, Iterable, Mapping, Optional
 from uuid import UUID, uuid4
 
 from sqlalchemy.orm import Session, sessionmaker
 
 from fastapi import Depends, FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from starlette.concurrency import run_in_threadpool
 
 from config import Settings, get_settings
@@ -43,8 +47,10 @@ from models.schema import (
     StoredSummary,
     StoredTranscript,
 )
+from services.audio_chunker import AudioChunkConfig
 from services.audio_extractor import AudioExtractor, AudioExtractionError, AudioExtractionOptions
 from services.storage import LocalFileStorage, MediaLocation, MediaStorage, StorageError
+from services.transcription_cache import TranscriptionCache
 from services.transcription_api import (
     APITranscriptionError,
     APITranscriptionOptions,
@@ -64,18 +70,26 @@ from services.transcription_local import (
 )
 from services.vector_store import VectorStoreClient
 from services.transcript_indexer import TranscriptIndexer, IndexingError
+from services.video_downloader import (
+    ProviderError,
+    VideoDownloadRequest,
+    VideoDownloadResponse,
+    VideoDownloadService,
+)
+from repositories.base import current_write_version
 from repositories.video_repository import VideoRepository
 from repositories.transcript_repository import TranscriptRepository
 from repositories.summary_repository import SummaryRepository
+from utils.cache import StaleWhileRevalidateCache
 
 logger = logging.getLogger(__name__)
 
-from services.video_downloader import (
-    ProviderError,
-    VideoDownloadRequest,
-    VideoDownloadResponse,
-    VideoDownloadService,
+_video_list_cache: StaleWhileRevalidateCache[VideoListResponse] = StaleWhileRevalidateCache(
+    ttl=5.0,
+    stale_ttl=30.0,
+    maxsize=64,
 )
+_background_tasks: set[asyncio.Task] = set()
 
 
 def create_app() -> FastAPI:
@@ -99,10 +113,19 @@ def create_app() -> FastAPI:
     )
 
     register_routes(app)
+    app.add_event_handler("shutdown", _close_http_clients)
 
     return app
 
 
+def _close_http_clients() -> None:
+    # Закрываем только уже созданные сервисы, не инициализируя остальные
+    if get_summary_generator.cache_info().currsize:
+        get_summary_generator().close()
+    if get_api_transcription_service.cache_info().currsize:
+        get_api_transcription_service().close()
+
+
 def register_routes(app: FastAPI) -> None:
     @app.post(
         "/api/video/extract",
@@ -162,23 +185,17 @@ def register_routes(app: FastAPI) -> None:
         limit: int = 50,
         db: Session = Depends(get_db_session_dependency),
     ) -> VideoListResponse:
-        repo = VideoRepository(db)
-        videos = repo.list(limit=limit)
-        items = [
-            VideoListItem(
-                id=str(video.id),
-                title=video.title,
-                source_url=video.source_url,
-                provider=video.provider,
-                status=video.status,
-                audio_path=video.audio_path,
-                created_at=video.created_at,
-                has_transcript=bool(video.transcripts),
-                has_summary=bool(video.summaries),
-            )
-            for video in videos
-        ]
-        return VideoListResponse(items=items)
+        cache_key = (limit,)
+        version = current_write_version()
+        cached, is_stale = _video_list_cache.get(cache_key, version)
+        if cached is not None:
+            if is_stale:
+                _schedule_video_list_refresh(limit, version)
+            return cached
+
+        response = _load_video_list(db, limit)
+        _video_list_cache.set(cache_key, response, version)
+        return response
 
     @app.get(
         "/api/videos/{video_id}",
@@ -346,6 +363,7 @@ def register_routes(app: FastAPI) -> None:
             prompt=payload.api_options.prompt if payload.api_options else None,
             response_format=payload.api_options.response_format if payload.api_options else "json",
             temperature=payload.api_options.temperature if payload.api_options else 0.0,
+            semantic_cache_threshold=payload.api_options.semantic_cache_threshold if payload.api_options else None,
         )
 
         video_uuid = _parse_video_id(payload.video_id)
@@ -510,8 +528,7 @@ def register_routes(app: FastAPI) -> None:
             )
 
         try:
-            answer, sources = await run_in_threadpool(
-                agent.answer,
+            answer, sources = await agent.answer_async(
                 payload.question,
                 payload.video_id,
                 payload.top_k,
@@ -529,6 +546,40 @@ def register_routes(app: FastAPI) -> None:
             model=agent._llm_model,
         )
 
+    @app.post(
+        "/api/chat/stream",
+        status_code=status.HTTP_200_OK,
+        summary="Чат-консультант с потоковой выдачей ответа (SSE)",
+    )
+    async def chat_stream_endpoint(
+        payload: ChatRequest,
+        agent: ConsultantAgent = Depends(get_consultant_agent),
+    ) -> StreamingResponse:
+        if not payload.question or not payload.question.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Question is required and cannot be empty",
+            )
+
+        try:
+            tokens, sources = await agent.answer_stream_async(
+                payload.question,
+                payload.video_id,
+                payload.top_k,
+                payload.language,
+            )
+        except ConsultantError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(exc),
+            ) from exc
+
+        return StreamingResponse(
+            _chat_sse_events(tokens, sources, agent._llm_model),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
 
 @lru_cache()
 def get_media_storage() -> MediaStorage:
@@ -568,14 +619,28 @@ def get_audio_extractor() -> AudioExtractor:
     settings: Settings = get_settings()
     return AudioExtractor(
         ffmpeg_executable=settings.ffmpeg_path,
+        ffprobe_executable=settings.ffprobe_path,
         workdir=settings.download_workdir,
     )
 
 
+@lru_cache()
+def get_transcription_cache() -> TranscriptionCache | None:
+    settings: Settings = get_settings()
+    if settings.transcription_cache_dir is None:
+        return None
+    # Один кэш на оба сервиса: одно соединение SQLite и общий лимит размера
+    return TranscriptionCache(
+        settings.transcription_cache_dir,
+        ttl_seconds=settings.transcription_cache_ttl_days * 86400,
+        size_limit_bytes=settings.transcription_cache_size_mb * 1024 * 1024,
+    )
+
+
 @lru_cache()
 def get_local_transcription_service() -> LocalTranscriptionService:
     settings: Settings = get_settings()
-    return LocalTranscriptionService(model_name=settings.whisper_model)
+    return LocalTranscriptionService(model_name=settings.whisper_model, cache=get_transcription_cache())
 
 
 @lru_cache()
@@ -583,7 +648,15 @@ def get_api_transcription_service() -> APITranscriptionService:
     settings: Settings = get_settings()
     if not settings.openai_api_key:
         raise ValueError("OpenAI API key is required for API transcription")
-    return APITranscriptionService(api_key=settings.openai_api_key)
+    return APITranscriptionService(
+        api_key=settings.openai_api_key,
+        chunk_config=AudioChunkConfig(
+            ffmpeg_executable=settings.ffmpeg_path,
+            in_memory=settings.transcription_chunks_in_memory,
+        ),
+        cache=get_transcription_cache(),
+        vector_store=get_vector_store_client(),
+    )
 
 
 @lru_cache()
@@ -611,11 +684,54 @@ def get_transcript_indexer() -> TranscriptIndexer:
 
 
 def _resolve_audio_path(raw_path: str) -> Path:
-    path = Path(raw_path)
-    if path.is_absolute():
-        return path
+    if os.path.isabs(raw_path):
+        return Path(raw_path)
     settings: Settings = get_settings()
-    return settings.data_audio_dir / path
+    return Path(settings.audio_dir_str, raw_path)
+
+
+def _load_video_list(db: Session, limit: int) -> VideoListResponse:
+    repo = VideoRepository(db)
+    rows = repo.list_with_flags(limit=limit)
+    items = [
+        VideoListItem(
+            id=str(video.id),
+            title=video.title,
+            source_url=video.source_url,
+            provider=video.provider,
+            status=video.status,
+            audio_path=video.audio_path,
+            created_at=video.created_at,
+            has_transcript=has_transcript,
+            has_summary=has_summary,
+        )
+        for video, has_transcript, has_summary in rows
+    ]
+    return VideoListResponse(items=items)
+
+
+def _schedule_video_list_refresh(limit: int, version: int) -> None:
+    """Обновляет устаревшую запись кэша списка видео в фоне (stale-while-revalidate)."""
+    cache_key = (limit,)
+    if not _video_list_cache.begin_refresh(cache_key):
+        return
+
+    def _reload() -> VideoListResponse:
+        with get_sessionmaker()() as session:
+            return _load_video_list(session, limit)
+
+    async def _refresh() -> None:
+        try:
+            response = await run_in_threadpool(_reload)
+            _video_list_cache.set(cache_key, response, version)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to refresh video list cache", extra={"limit": limit, "error": str(exc)})
+        finally:
+            _video_list_cache.end_refresh(cache_key)
+
+    task = asyncio.create_task(_refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
 
 def _upsert_video_record(
@@ -772,7 +888,7 @@ def _delete_video(
         settings = get_settings()
         media_location = MediaLocation(
             uri=video.audio_path,
-            path=settings.data_audio_dir / video.audio_path,
+            path=Path(settings.audio_dir_str, video.audio_path),
         )
         try:
             storage.delete(media_location)
@@ -782,7 +898,23 @@ def _delete_video(
                 extra={"video_id": str(video_uuid), "error": str(exc)},
             )
 
-    db.delete(video)
+    VideoRepository(db).delete(video)
+
+
+def _sse_event(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _chat_sse_events(tokens: AsyncIterator[str], sources: list[dict], model: str) -> AsyncIterator[str]:
+    """Формирует SSE-поток: источники, фрагменты ответа, завершающее событие."""
+    yield _sse_event("sources", {"sources": sources, "model": model})
+    try:
+        async for token in tokens:
+            yield _sse_event("token", token)
+    except ConsultantError as exc:
+        yield _sse_event("error", {"detail": str(exc)})
+        return
+    yield _sse_event("done", {})
 
 
 def _parse_video_id(raw_video_id: Optional[str]) -> Optional[UUID]:
@@ -1,15 +1,38 @@
 """
 @file: backend/database/base.py
 @description: Базовые декларативные модели SQLAlchemy.
-@dependencies: sqlalchemy.orm
+@dependencies: sqlalchemy.orm, os, time, uuid
 @created: 2025-11-12
 """
 
 from __future__ import annotations
 
+import os
+import time
+import uuid
+
 from sqlalchemy.orm import DeclarativeBase
 
 
+def uuid7() -> uuid.UUID:
+    """
+    Генерирует UUID версии 7 (RFC 9562): 48 бит unix-времени в мс + случайные биты.
+
+    Упорядоченные по времени ключи вставляются в конец B-tree индекса,
+    что снижает количество расщеплений страниц по сравнению с uuid4.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    rand_a = rand >> 68  # 12 бит
+    rand_b = rand & ((1 << 62) - 1)  # 62 бита
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= rand_a << 64
+    value |= 0b10 << 62
+    value |= rand_b
+    return uuid.UUID(int=value)
+
+
 class Base(DeclarativeBase):
     """Базовый класс для всех ORM-моделей."""
 
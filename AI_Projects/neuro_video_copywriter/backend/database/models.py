@@ -11,11 +11,11 @@ import datetime as dt
 import uuid
 from typing import Optional
 
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Index, String, Text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from database.base import Base
+from database.base import Base, uuid7
 
 
 class Video(Base):
@@ -23,13 +23,13 @@ class Video(Base):
 
     __tablename__ = "videos"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     source_url: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
     provider: Mapped[str] = mapped_column(String(32), nullable=False)
     title: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String(32), default="pending", nullable=False)
     audio_path: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    created_at: Mapped[dt.datetime] = mapped_column(default=dt.datetime.utcnow, nullable=False)
+    created_at: Mapped[dt.datetime] = mapped_column(default=dt.datetime.utcnow, nullable=False, index=True)
     updated_at: Mapped[dt.datetime] = mapped_column(
         default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow, nullable=False
     )
@@ -43,10 +43,10 @@ class Transcript(Base):
 
     __tablename__ = "transcripts"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    video_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    video_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
     language: Mapped[str] = mapped_column(String(16), nullable=False, default="ru")
-    content: Mapped[str] = mapped_column(Text, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False, deferred=True)
     extra: Mapped[dict] = mapped_column("metadata", JSONB, default=dict, nullable=False)
     created_at: Mapped[dt.datetime] = mapped_column(default=dt.datetime.utcnow, nullable=False)
 
@@ -57,9 +57,10 @@ class Summary(Base):
     """Методички/резюме по лекциям."""
 
     __tablename__ = "summaries"
+    __table_args__ = (Index("ix_summaries_data_gin", "data", postgresql_using="gin"),)
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    video_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    video_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     data: Mapped[dict] = mapped_column(JSONB, default=dict, nullable=False)
     created_at: Mapped[dt.datetime] = mapped_column(default=dt.datetime.utcnow, nullable=False)
@@ -71,8 +72,9 @@ class ProcessingJob(Base):
     """Журнал выполнения фоновых задач."""
 
     __tablename__ = "processing_jobs"
+    __table_args__ = (Index("ix_processing_jobs_payload_gin", "payload", postgresql_using="gin"),)
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     video_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("videos.id", ondelete="SET NULL"), nullable=True)
     job_type: Mapped[str] = mapped_column(String(64), nullable=False)
     status: Mapped[str] = mapped_column(String(32), default="pending", nullable=False)
@@ -30,7 +30,7 @@ def get_session_factory() -> sessionmaker[Session]:
     """Возвращает sessionmaker с ленивой инициализацией."""
     settings = get_settings()
     engine = _create_engine(settings)
-    return sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, future=True)
 
 
 def init_database() -> None:
@@ -0,0 +1,39 @@
+"""Add GIN indexes on JSONB payload columns.
+
+Revision ID: 20261017_jsonb_gin
+Revises: 20251117_add_audio_path
+Create Date: 2026-10-17 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_jsonb_gin"
+down_revision = "20251117_add_audio_path"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Apply migrations."""
+    op.create_index(
+        "ix_processing_jobs_payload_gin",
+        "processing_jobs",
+        ["payload"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_summaries_data_gin",
+        "summaries",
+        ["data"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Rollback migrations."""
+    op.drop_index("ix_summaries_data_gin", table_name="summaries")
+    op.drop_index("ix_processing_jobs_payload_gin", table_name="processing_jobs")
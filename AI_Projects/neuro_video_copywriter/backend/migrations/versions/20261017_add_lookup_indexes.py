@@ -0,0 +1,32 @@
+"""Add btree indexes for video listing and per-video lookups.
+
+Revision ID: 20261017_lookup_idx
+Revises: 20261017_jsonb_gin
+Create Date: 2026-10-17 00:00:00
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_lookup_idx"
+down_revision = "20261017_jsonb_gin"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Apply migrations."""
+    # source_url уже проиндексирован уникальным ограничением uq_videos_source_url
+    op.create_index("ix_videos_created_at", "videos", ["created_at"])
+    op.create_index("ix_transcripts_video_id", "transcripts", ["video_id"])
+    op.create_index("ix_summaries_video_id", "summaries", ["video_id"])
+
+
+def downgrade() -> None:
+    """Rollback migrations."""
+    op.drop_index("ix_summaries_video_id", table_name="summaries")
+    op.drop_index("ix_transcripts_video_id", table_name="transcripts")
+    op.drop_index("ix_videos_created_at", table_name="videos")
@@ -12,7 +12,7 @@ from typing import Any, Dict, Optional
 from uuid import uuid4
 from datetime import datetime
 
-from pydantic import BaseModel, Field, HttpUrl, validator
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 
 
 class ProviderLiteral(str, Enum):
@@ -39,7 +39,9 @@ class VideoExtractRequest(BaseModel):
         description="Явная подсказка провайдера; auto — определить автоматически",
     )
     request_id: Optional[str] = Field(
-        default=None, description="Идентификатор запроса, если требуется отслеживание"
+        default=None,
+        validate_default=True,
+        description="Идентификатор запроса, если требуется отслеживание",
     )
     options: VideoExtractOptions = Field(
         default_factory=VideoExtractOptions, description="Настройки извлечения"
@@ -48,7 +50,8 @@ class VideoExtractRequest(BaseModel):
         default_factory=dict, description="Дополнительные метаданные контекста"
     )
 
-    @validator("request_id", pre=True, always=True)
+    @field_validator("request_id", mode="before")
+    @classmethod
     def default_request_id(cls, value: Optional[str]) -> str:
         return value or uuid4().hex
 
@@ -63,7 +66,7 @@ class VideoExtractResponse(BaseModel):
 class VideoListItem(BaseModel):
     id: str = Field(..., description="ID видео")
     title: Optional[str] = Field(default=None, description="Заголовок видео")
-    source_url: HttpUrl = Field(..., description="Оригинальный URL видео")
+    source_url: str = Field(..., description="Оригинальный URL видео")
     provider: str = Field(..., description="Провайдер медиа")
     status: str = Field(..., description="Статус обработки")
     audio_path: Optional[str] = Field(default=None, description="Путь к сохраненному аудио")
@@ -94,6 +97,12 @@ class APITranscriptionOptions(BaseModel):
     prompt: Optional[str] = Field(default=None, description="Подсказка для улучшения точности")
     response_format: str = Field(default="json", description="Формат ответа (json, text, srt, verbose_json, vtt)")
     temperature: float = Field(default=0.0, ge=0.0, le=1.0, description="Температура для генерации")
+    semantic_cache_threshold: Optional[float] = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Порог близости отпечатка аудио для повторного использования транскрипта (None — выключено)",
+    )
 
 
 class TranscribeRequest(BaseModel):
@@ -177,7 +186,7 @@ class StoredSummary(BaseModel):
 class VideoDetailResponse(BaseModel):
     id: str = Field(..., description="ID видео")
     title: Optional[str] = Field(default=None, description="Заголовок видео")
-    source_url: HttpUrl = Field(..., description="Источник видео")
+    source_url: str = Field(..., description="Источник видео")
     provider: str = Field(..., description="Провайдер")
     status: str = Field(..., description="Статус обработки")
     audio_path: Optional[str] = Field(default=None, description="Путь к аудио")
@@ -7,12 +7,46 @@
 
 from __future__ import annotations
 
+import itertools
 from typing import Generic, Optional, TypeVar
 
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 ModelT = TypeVar("ModelT")
 
+_PENDING_WRITE_KEY = "nvc_pending_write"
+
+_write_counter = itertools.count(1)
+_write_version = 0
+
+
+def current_write_version() -> int:
+    """Возвращает номер последней записи через репозитории (для инвалидации кэшей)."""
+    return _write_version
+
+
+def mark_write(session: Session) -> None:
+    """
+    Отмечает изменение данных в транзакции сессии.
+
+    Версия увеличивается только после успешного commit: иначе параллельный запрос успел бы
+    закэшировать ещё не зафиксированные строки под новой версией.
+    """
+    session.info[_PENDING_WRITE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_write_version(session: Session) -> None:
+    global _write_version
+    if session.info.pop(_PENDING_WRITE_KEY, False):
+        _write_version = next(_write_counter)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_write(session: Session) -> None:
+    session.info.pop(_PENDING_WRITE_KEY, None)
+
 
 class Repository(Generic[ModelT]):
     """Базовый репозиторий поверх SQLAlchemy сессии."""
@@ -22,10 +56,12 @@ class Repository(Generic[ModelT]):
 
     def add(self, instance: ModelT) -> ModelT:
         self._session.add(instance)
+        mark_write(self._session)
         return instance
 
     def delete(self, instance: ModelT) -> None:
         self._session.delete(instance)
+        mark_write(self._session)
 
     def get(self, model: type[ModelT], obj_id) -> Optional[ModelT]:
         return self._session.get(model, obj_id)
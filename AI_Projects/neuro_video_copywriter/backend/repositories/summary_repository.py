@@ -10,10 +10,10 @@ from __future__ import annotations
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from database import models
-from repositories.base import Repository
+from repositories.base import Repository, mark_write
 
 
 class SummaryRepository(Repository[models.Summary]):
@@ -26,6 +26,7 @@ class SummaryRepository(Repository[models.Summary]):
         return (
             self._session.query(models.Summary)
             .filter(models.Summary.video_id == video_id)
+            .options(joinedload(models.Summary.video))
             .order_by(models.Summary.created_at.desc())
             .first()
         )
@@ -48,4 +49,5 @@ class SummaryRepository(Repository[models.Summary]):
 
     def delete_by_video(self, video_id: UUID) -> None:
         self._session.query(models.Summary).filter(models.Summary.video_id == video_id).delete(synchronize_session=False)
+        mark_write(self._session)
 
@@ -10,7 +10,7 @@ from __future__ import annotations
 from typing import Iterable, Optional
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, load_only, undefer
 
 from database import models
 from repositories.base import Repository
@@ -43,9 +43,19 @@ class TranscriptRepository(Repository[models.Transcript]):
         return transcript
 
     def list_by_video(self, video_id: UUID) -> list[models.Transcript]:
+        """Возвращает транскрипты видео без загрузки полного текста (content)."""
         return (
             self._session.query(models.Transcript)
             .filter(models.Transcript.video_id == video_id)
+            .options(
+                load_only(
+                    models.Transcript.id,
+                    models.Transcript.video_id,
+                    models.Transcript.language,
+                    models.Transcript.created_at,
+                ),
+                joinedload(models.Transcript.video),
+            )
             .order_by(models.Transcript.created_at.asc())
             .all()
         )
@@ -54,17 +64,32 @@ class TranscriptRepository(Repository[models.Transcript]):
         return (
             self._session.query(models.Transcript)
             .filter(models.Transcript.video_id == video_id)
+            .options(joinedload(models.Transcript.video), undefer(models.Transcript.content))
             .order_by(models.Transcript.created_at.desc())
             .first()
         )
 
     def add_with_embeddings(self, transcript: models.Transcript, chunks: Iterable[dict]) -> models.Transcript:
-        """Сохраняет транскрипт и соответствующие эмбеддинги в Qdrant."""
+        """
+        Сохраняет транскрипт и соответствующие эмбеддинги в Qdrant.
+
+        Чанки — словари с ключами id, vector, text и необязательным metadata; в Qdrant
+        они уходят колонками, как в TranscriptIndexer.
+        """
         self.add(transcript)
+        ids: list[str] = []
+        vectors: list = []
+        payloads: list[dict] = []
+        for chunk in chunks:
+            ids.append(chunk["id"])
+            vectors.append(chunk["vector"])
+            payloads.append({"text": chunk["text"], "metadata": chunk.get("metadata", {})})
         self._vector_client.upsert_transcript_chunks(
             video_id=transcript.video_id,
             transcript_id=transcript.id,
-            chunks=chunks,
+            ids=ids,
+            vectors=vectors,
+            payloads=payloads,
         )
         return transcript
 
@@ -72,6 +97,6 @@ class TranscriptRepository(Repository[models.Transcript]):
         """Удаляет транскрипт и эмбеддинги."""
         transcripts = self.list_by_video(video_id)
         for transcript in transcripts:
-            self._session.delete(transcript)
+            self.delete(transcript)
             self._vector_client.delete_transcript_chunks(transcript_id=transcript.id)
 
@@ -7,13 +7,16 @@
 
 from __future__ import annotations
 
+import datetime as dt
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, load_only
 
 from database import models
-from repositories.base import Repository
+from repositories.base import Repository, mark_write
 
 
 class VideoRepository(Repository[models.Video]):
@@ -28,16 +31,47 @@ class VideoRepository(Repository[models.Video]):
     def list(self, limit: int = 50) -> list[models.Video]:
         return (
             self._session.query(models.Video)
+            .options(
+                load_only(
+                    models.Video.id,
+                    models.Video.source_url,
+                    models.Video.title,
+                    models.Video.provider,
+                    models.Video.status,
+                    models.Video.created_at,
+                )
+            )
+            .order_by(models.Video.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+    def list_with_flags(self, limit: int = 50) -> list[tuple[models.Video, bool, bool]]:
+        """Возвращает видео вместе с флагами наличия транскрипта и методички одним запросом."""
+        has_transcript = exists().where(models.Transcript.video_id == models.Video.id).label("has_transcript")
+        has_summary = exists().where(models.Summary.video_id == models.Video.id).label("has_summary")
+        rows = (
+            self._session.query(models.Video, has_transcript, has_summary)
             .order_by(models.Video.created_at.desc())
             .limit(limit)
             .all()
         )
+        return [(video, bool(transcript_flag), bool(summary_flag)) for video, transcript_flag, summary_flag in rows]
 
     def get_by_id(self, video_id: UUID) -> Optional[models.Video]:
         return self._session.get(models.Video, video_id)
 
-    def update_status(self, video_id: UUID, status: str) -> None:
-        self._session.query(models.Video).filter(models.Video.id == video_id).update({"status": status})
+    def update_status(self, video_id: UUID, status: str) -> int:
+        """Обновляет статус одним UPDATE; возвращает число затронутых строк (0 — видео не найдено)."""
+        result = self._session.execute(
+            update(models.Video)
+            .where(models.Video.id == video_id)
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            mark_write(self._session)
+        return result.rowcount
 
     def upsert_downloaded_video(
         self,
@@ -48,23 +82,50 @@ class VideoRepository(Repository[models.Video]):
         title: Optional[str] = None,
         status: str = "downloaded",
     ) -> models.Video:
-        video = self.find_by_url(source_url)
-        if video is None:
-            video = models.Video(
-                source_url=source_url,
-                provider=provider,
-                title=title,
-                status=status,
-                audio_path=audio_path,
+        """Создаёт или обновляет видео по source_url одним запросом INSERT ... ON CONFLICT."""
+        videos = self.upsert_many(
+            [
+                {
+                    "source_url": source_url,
+                    "provider": provider,
+                    "audio_path": audio_path,
+                    "title": title,
+                    "status": status,
+                }
+            ]
+        )
+        return videos[0]
+
+    def upsert_many(self, rows: list[dict]) -> list[models.Video]:
+        """
+        Пакетный upsert видео по source_url (multi-row VALUES, один round-trip).
+
+        Пустой title не затирает ранее сохранённый заголовок. Видео возвращаются в порядке
+        входных строк: порядок RETURNING у INSERT ... ON CONFLICT не гарантирован.
+        """
+        if not rows:
+            return []
+
+        # ON CONFLICT не может обновить одну строку дважды в одном запросе
+        unique_rows = list({row["source_url"]: row for row in rows}.values())
+        stmt = insert(models.Video).values(unique_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Video.source_url],
+            set_={
+                "provider": stmt.excluded.provider,
+                "status": stmt.excluded.status,
+                "audio_path": stmt.excluded.audio_path,
+                "title": func.coalesce(func.nullif(stmt.excluded.title, ""), models.Video.title),
+                "updated_at": dt.datetime.utcnow(),
+            },
+        )
+        videos_by_url = {
+            video.source_url: video
+            for video in self._session.scalars(
+                stmt.returning(models.Video),
+                execution_options={"populate_existing": True},
             )
-            self.add(video)
-        else:
-            video.provider = provider
-            video.status = status
-            video.audio_path = audio_path
-            if title:
-                video.title = title
-
-        self._session.flush()
-        return video
+        }
+        mark_write(self._session)
+        return [videos_by_url[row["source_url"]] for row in rows]
 
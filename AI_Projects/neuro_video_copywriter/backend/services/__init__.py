@@ -19,6 +19,7 @@ from .transcription_local import (
     TranscriptionOptions,
     TranscriptionResult,
 )
+from .transcription_cache import TranscriptionCache
 from .consultant_agent import ConsultantAgent, ConsultantError
 from .embedding_service import EmbeddingError, EmbeddingService
 from .transcript_indexer import IndexingError, TranscriptIndexer
@@ -63,6 +64,8 @@ __all__ = [
     "APITranscriptionOptions",
     "APITranscriptionResult",
     "APITranscriptionError",
+    # Transcription cache
+    "TranscriptionCache",
     # Summary generator
     "SummaryGenerator",
     "SummaryOptions",
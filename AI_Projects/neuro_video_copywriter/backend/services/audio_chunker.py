@@ -1,23 +1,55 @@
 """
 @file: audio_chunker.py
 @description: Утилита для разбиения аудиофайлов на части под ограничения OpenAI API.
-@dependencies: pydub, pathlib, tempfile, logging
+@dependencies: subprocess, shutil, concurrent.futures, pathlib, tempfile, logging, soundfile/pydub/lameenc (fallback без ffmpeg)
 @created: 2025-11-17
 """
 
 from __future__ import annotations
 
+import io
+import itertools
 import logging
+import os
+import queue
 import shutil
+import subprocess
 import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator, List
+from typing import Callable, Iterator, List, Optional, Union
 
-from pydub import AudioSegment
+try:
+    import soundfile
+except ImportError:
+    soundfile = None  # type: ignore
+
+try:
+    import lameenc
+except ImportError:
+    lameenc = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
+# Форматы, которые libsndfile читает напрямую в numpy-массив
+SOUNDFILE_INPUT_SUFFIXES = frozenset({".wav", ".flac", ".ogg"})
+SIZE_ESTIMATE_SLACK = 1.05  # запас на заголовки контейнера и неточность битрейта
+PIPE_READ_BYTES = 256 * 1024
+_PREFETCH_DONE = object()
+
+# Битрейты Layer III (кбит/с) по индексу из заголовка кадра: MPEG-1 и MPEG-2/2.5
+_MP3_BITRATES = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Частоты дискретизации по версии MPEG (биты версии заголовка: 3 — MPEG-1, 2 — MPEG-2, 0 — MPEG-2.5)
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+AudioChunk = Union[Path, io.BytesIO]
+
 
 class AudioChunkError(Exception):
     """Ошибка при разбиении аудио."""
@@ -32,6 +64,11 @@ class AudioChunkConfig:
     min_chunk_duration_ms: int = 60 * 1000  # 1 минута
     duration_step_ratio: float = 0.8  # во сколько раз уменьшать длину при превышении лимита
     output_format: str = "mp3"
+    output_codec: str = "libmp3lame"
+    output_bitrate_kbps: int = 64  # битрейт чанков при перекодировании ffmpeg
+    ffmpeg_executable: str = "ffmpeg"
+    in_memory: bool = False  # prefetch_iter отдаёт чанки в памяти (BytesIO) без временных файлов; только mp3
+    max_workers: Optional[int] = None  # потоки экспорта в in-memory режиме; None — min(4, CPU)
     temp_prefix: str = "nvc-audio-chunk"
 
     def __post_init__(self) -> None:
@@ -41,6 +78,10 @@ class AudioChunkConfig:
             raise ValueError("min_chunk_duration_ms must be positive")
         if self.initial_chunk_duration_ms < self.min_chunk_duration_ms:
             raise ValueError("initial_chunk_duration_ms must be >= min_chunk_duration_ms")
+        if self.output_bitrate_kbps <= 0:
+            raise ValueError("output_bitrate_kbps must be positive")
+        if self.max_workers is not None and self.max_workers <= 0:
+            raise ValueError("max_workers must be positive")
 
 
 class AudioChunker:
@@ -72,6 +113,9 @@ class AudioChunker:
         """
         Разбивает аудиофайл на части, размер которых не превышает ограничения API.
 
+        Основной путь — один проход ffmpeg segment muxer (файл читается потоково,
+        без загрузки в память). Если ffmpeg недоступен, используется разбиение в памяти.
+
         Args:
             audio_path: исходный аудиофайл
 
@@ -81,51 +125,474 @@ class AudioChunker:
         if not audio_path.exists():
             raise AudioChunkError(f"Audio file not found: {audio_path}")
 
-        audio = AudioSegment.from_file(audio_path)
-        chunk_duration_ms = self._config.initial_chunk_duration_ms
-        start_ms = 0
-        chunk_index = 1
-
-        while start_ms < len(audio):
-            chunk = audio[start_ms : start_ms + chunk_duration_ms]
-            chunk_name = f"chunk_{chunk_index}.{self._config.output_format}"
-            chunk_path = self._temp_dir / chunk_name
-            chunk.export(chunk_path, format=self._config.output_format)
-
-            file_size = chunk_path.stat().st_size
-            if file_size > self._config.max_chunk_bytes:
-                chunk_path.unlink(missing_ok=True)
-                next_duration = max(
-                    int(chunk_duration_ms * self._config.duration_step_ratio),
-                    self._config.min_chunk_duration_ms,
-                )
-                if next_duration == chunk_duration_ms:
-                    raise AudioChunkError(
-                        "Audio chunk size exceeds limit and cannot be reduced further"
-                    )
-                chunk_duration_ms = next_duration
+        if shutil.which(self._config.ffmpeg_executable) is None:
+            logger.warning(
+                "ffmpeg not found, falling back to in-memory chunking",
+                extra={"ffmpeg": self._config.ffmpeg_executable},
+            )
+            yield from self._chunk_in_memory(audio_path)
+            return
+
+        yield from self._chunk_with_ffmpeg(audio_path)
+
+    def stream_chunks(self, audio_path: Path) -> Iterator[io.BytesIO]:
+        """
+        Разбивает аудио на MP3-чанки в памяти, не записывая их на диск.
+
+        ffmpeg кодирует весь файл в один MP3-поток в stdout; поток режется по границам
+        кадров так, чтобы чанк не превышал max_chunk_bytes. Кадр MP3 декодируется
+        самостоятельно, поэтому каждый чанк — корректный файл. Без ffmpeg чанки
+        готовятся запасным путём через временные файлы и читаются в память.
+
+        Yields:
+            Буфер с байтами чанка (позиция в начале)
+        """
+        if not audio_path.exists():
+            raise AudioChunkError(f"Audio file not found: {audio_path}")
+        if self._config.output_format != "mp3":
+            raise AudioChunkError("In-memory chunking supports only mp3 output")
+
+        if shutil.which(self._config.ffmpeg_executable) is None:
+            for chunk_path in self._chunk_in_memory(audio_path):
+                yield io.BytesIO(chunk_path.read_bytes())
+                chunk_path.unlink()
+            return
+
+        cmd = [
+            self._config.ffmpeg_executable,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            str(audio_path),
+            "-vn",
+            "-map_metadata",
+            "-1",
+            "-c:a",
+            self._config.output_codec,
+            "-b:a",
+            f"{self._config.output_bitrate_kbps}k",
+            # Ни тегов, ни Xing-заголовка с длительностью всего файла: поток состоит только из кадров
+            "-id3v2_version",
+            "0",
+            "-write_xing",
+            "0",
+            "-f",
+            "mp3",
+            "pipe:1",
+        ]
+        logger.debug("Running ffmpeg stream encoder", extra={"cmd": " ".join(cmd)})
+
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        chunk_index = 0
+        try:
+            pending = bytearray()
+            chunk = bytearray()
+            while block := process.stdout.read(PIPE_READ_BYTES):
+                pending += block
+                position = 0
+                while position + 4 <= len(pending):
+                    frame_length = _mp3_frame_length(pending, position)
+                    if frame_length == 0:
+                        position += 1  # мусор до синхрослова — пропускаем побайтно
+                        continue
+                    if position + frame_length > len(pending):
+                        break
+                    if len(chunk) + frame_length > self._config.max_chunk_bytes:
+                        chunk_index += 1
+                        yield self._finish_chunk(audio_path, chunk_index, chunk)
+                        chunk = bytearray()
+                    chunk += pending[position : position + frame_length]
+                    position += frame_length
+                del pending[:position]
+
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                raise AudioChunkError(f"ffmpeg encoding failed: {stderr.decode(errors='replace').strip()}")
+            if chunk:
+                chunk_index += 1
+                yield self._finish_chunk(audio_path, chunk_index, chunk)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+        if not chunk_index:
+            raise AudioChunkError(f"ffmpeg did not produce any audio for {audio_path}")
+
+    @staticmethod
+    def _finish_chunk(audio_path: Path, chunk_index: int, chunk: bytearray) -> io.BytesIO:
+        logger.debug(
+            "Chunk created",
+            extra={"audio_path": str(audio_path), "chunk_index": chunk_index, "chunk_size_bytes": len(chunk)},
+        )
+        return io.BytesIO(chunk)
+
+    def prefetch_iter(self, audio_path: Path, prefetch: int = 2) -> Iterator[AudioChunk]:
+        """
+        То же, что :meth:`chunk` (или :meth:`stream_chunks` при ``in_memory``), но чанки
+        готовятся в фоновом потоке с опережением.
+
+        Пока потребитель обрабатывает (например, отправляет в API) чанк N, следующие
+        ``prefetch`` чанков уже кодируются. Ошибки фонового потока пробрасываются потребителю.
+        """
+        if prefetch <= 0:
+            raise ValueError("prefetch must be positive")
+
+        buffer: queue.Queue = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+
+        def put(item: object) -> bool:
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                source = self.stream_chunks if self._config.in_memory else self.chunk
+                for chunk in source(audio_path):
+                    if not put(chunk):
+                        return
+            except BaseException as exc:  # noqa: BLE001 - передаём потребителю
+                put(exc)
+                return
+            put(_PREFETCH_DONE)
+
+        worker = threading.Thread(target=produce, name="nvc-chunk-prefetch", daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is _PREFETCH_DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Потребитель мог прервать итерацию: останавливаем производителя до очистки temp-каталога
+            stop.set()
+            worker.join()
+
+    def _initial_duration_ms(self) -> int:
+        """Стартовая длина чанка с учётом лимита размера при заданном битрейте."""
+        return self._size_limited_duration_ms(self._config.output_bitrate_kbps * 1000 / 8)
+
+    def _size_limited_duration_ms(self, bytes_per_second: float) -> int:
+        """Длина чанка, при которой оценка размера (байт/с × длительность) укладывается в лимит."""
+        size_limited_ms = int(self._config.max_chunk_bytes / (bytes_per_second * SIZE_ESTIMATE_SLACK) * 1000)
+        return max(
+            min(self._config.initial_chunk_duration_ms, size_limited_ms),
+            self._config.min_chunk_duration_ms,
+        )
+
+    def _next_duration_ms(self, chunk_duration_ms: int) -> int:
+        next_duration = max(
+            int(chunk_duration_ms * self._config.duration_step_ratio),
+            self._config.min_chunk_duration_ms,
+        )
+        if next_duration == chunk_duration_ms:
+            raise AudioChunkError("Audio chunk size exceeds limit and cannot be reduced further")
+        return next_duration
+
+    def _chunk_with_ffmpeg(self, audio_path: Path) -> Iterator[Path]:
+        """
+        Отдаёт чанки по мере того, как ffmpeg их дописывает, не дожидаясь конца файла.
+
+        Потребитель (загрузка в API) работает параллельно с кодированием следующих чанков.
+        Чанк, превысивший лимит размера, дорезается на более короткие на месте, с сохранением порядка.
+        """
+        chunk_duration_ms = self._initial_duration_ms()
+        output_dir = self._temp_dir / "segments"
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        chunk_index = 0
+        for segment_path in self._stream_segments(audio_path, output_dir, chunk_duration_ms):
+            for chunk_path in self._fit_chunk(segment_path, chunk_duration_ms):
+                chunk_index += 1
+                self._produced_files.append(chunk_path)
                 logger.debug(
-                    "Chunk size too large, reducing duration",
+                    "Chunk created",
                     extra={
                         "audio_path": str(audio_path),
                         "chunk_index": chunk_index,
-                        "attempt_duration_ms": chunk_duration_ms,
+                        "chunk_size_bytes": chunk_path.stat().st_size,
                     },
                 )
-                continue
-
-            self._produced_files.append(chunk_path)
-            logger.debug(
-                "Chunk created",
-                extra={
-                    "audio_path": str(audio_path),
-                    "chunk_index": chunk_index,
-                    "chunk_duration_ms": chunk_duration_ms,
-                    "chunk_size_bytes": file_size,
-                },
-            )
+                yield chunk_path
+
+        if not chunk_index:
+            raise AudioChunkError(f"ffmpeg did not produce any chunks for {audio_path}")
+
+    def _stream_segments(self, audio_path: Path, output_dir: Path, chunk_duration_ms: int) -> Iterator[Path]:
+        """Запускает segment muxer и отдаёт каждый сегмент, как только ffmpeg закрыл его файл."""
+        # Список готовых сегментов ffmpeg пишет в stdout по одному имени на строку сразу после закрытия файла
+        cmd = self._segmenter_command(audio_path, output_dir, chunk_duration_ms)
+        cmd[-1:-1] = ["-segment_list", "pipe:1", "-segment_list_type", "flat"]
+        logger.debug("Running ffmpeg segmenter", extra={"cmd": " ".join(cmd)})
+
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            for line in process.stdout:
+                name = line.strip()
+                if name:
+                    yield output_dir / Path(name).name
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                raise AudioChunkError(f"ffmpeg segmenting failed: {stderr.strip() or process.returncode}")
+        finally:
+            # Потребитель мог прервать итерацию раньше — ffmpeg больше не нужен
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+    def _fit_chunk(self, chunk_path: Path, chunk_duration_ms: int) -> Iterator[Path]:
+        """Отдаёт чанк как есть или, если он больше лимита, его части меньшей длительности."""
+        if chunk_path.stat().st_size <= self._config.max_chunk_bytes:
             yield chunk_path
+            return
+
+        split_duration_ms = self._next_duration_ms(chunk_duration_ms)
+        logger.debug(
+            "Chunk size too large, reducing duration",
+            extra={"chunk": str(chunk_path), "attempt_duration_ms": split_duration_ms},
+        )
+        split_dir = chunk_path.with_name(f"{chunk_path.stem}_split")
+        split_dir.mkdir(exist_ok=True)
+        self._run_segmenter(chunk_path, split_dir, split_duration_ms)
+        chunk_path.unlink()
+        for part_path in sorted(split_dir.glob(f"chunk_*.{self._config.output_format}")):
+            yield from self._fit_chunk(part_path, split_duration_ms)
+
+    def _run_segmenter(self, audio_path: Path, output_dir: Path, chunk_duration_ms: int) -> None:
+        """Нарезает файл на сегменты заданной длины одним вызовом ffmpeg."""
+        cmd = self._segmenter_command(audio_path, output_dir, chunk_duration_ms)
+        logger.debug("Running ffmpeg segmenter", extra={"cmd": " ".join(cmd)})
+
+        try:
+            subprocess.run(cmd, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as exc:
+            raise AudioChunkError(f"ffmpeg segmenting failed: {exc.stderr.strip() if exc.stderr else exc}") from exc
+
+    def _segmenter_command(self, audio_path: Path, output_dir: Path, chunk_duration_ms: int) -> list[str]:
+        return [
+            self._config.ffmpeg_executable,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-i",
+            str(audio_path),
+            "-vn",
+            "-f",
+            "segment",
+            "-segment_time",
+            f"{chunk_duration_ms / 1000:.3f}",
+            "-reset_timestamps",
+            "1",
+            "-c:a",
+            self._config.output_codec,
+            "-b:a",
+            f"{self._config.output_bitrate_kbps}k",
+            str(output_dir / f"chunk_%05d.{self._config.output_format}"),
+        ]
+
+    def _chunk_in_memory(self, audio_path: Path) -> Iterator[Path]:
+        """Разбиение с загрузкой файла в память (запасной путь без ffmpeg)."""
+        if soundfile is not None and audio_path.suffix.lower() in SOUNDFILE_INPUT_SUFFIXES:
+            yield from self._chunk_with_soundfile(audio_path)
+        else:
+            yield from self._chunk_with_pydub(audio_path)
+
+    def _chunk_with_soundfile(self, audio_path: Path) -> Iterator[Path]:
+        """
+        Читает PCM один раз в непрерывный int16-массив и пишет чанки из срезов-представлений.
+
+        Срез numpy не копирует данные, поэтому на чанк не выделяется новый буфер PCM.
+        """
+        data, sample_rate = soundfile.read(str(audio_path), dtype="int16", always_2d=True)
+        write_format, extension = self._soundfile_output_format()
+        if write_format == "WAV":
+            # Размер WAV известен точно: int16 PCM без сжатия
+            initial_duration_ms = self._size_limited_duration_ms(sample_rate * data.shape[1] * 2)
+        else:
+            initial_duration_ms = self._config.initial_chunk_duration_ms
+
+        def export(start_ms: int, duration_ms: int, chunk_path: Path) -> None:
+            start_frame = start_ms * sample_rate // 1000
+            end_frame = (start_ms + duration_ms) * sample_rate // 1000
+            soundfile.write(str(chunk_path), data[start_frame:end_frame], sample_rate, format=write_format)
+
+        total_ms = -(-len(data) * 1000 // sample_rate)  # округление вверх, чтобы не потерять хвост
+        yield from self._export_slices(audio_path, total_ms, extension, initial_duration_ms, export)
+
+    def _soundfile_output_format(self) -> tuple[str, str]:
+        """Формат записи libsndfile: целевой, если поддерживается (MP3 — с libsndfile 1.1), иначе FLAC."""
+        requested = self._config.output_format.upper()
+        if requested in soundfile.available_formats():
+            return requested, self._config.output_format
+        return "FLAC", "flac"
+
+    def _chunk_with_pydub(self, audio_path: Path) -> Iterator[Path]:
+        from pydub import AudioSegment
+
+        audio = AudioSegment.from_file(audio_path)
+        bitrate = f"{self._config.output_bitrate_kbps}k"
+
+        if lameenc is not None and self._config.output_format == "mp3":
+            export = self._pcm_mp3_exporter(audio.set_sample_width(2))
+        else:
+
+            def export(start_ms: int, duration_ms: int, chunk_path: Path) -> None:
+                audio[start_ms : start_ms + duration_ms].export(
+                    chunk_path,
+                    format=self._config.output_format,
+                    bitrate=bitrate,
+                )
+
+        # Битрейт задан явно, поэтому длину чанка можно рассчитать до первого кодирования
+        yield from self._export_slices(
+            audio_path,
+            len(audio),
+            self._config.output_format,
+            self._initial_duration_ms(),
+            export,
+        )
+
+    def _pcm_mp3_exporter(self, audio) -> Callable[[int, int, Path], None]:
+        """
+        Кодирует MP3 через lameenc напрямую из срезов memoryview над PCM.
+
+        Срез не создаёт промежуточный AudioSegment; копируются только байты,
+        передаваемые кодеку.
+        """
+        pcm = memoryview(audio.raw_data)
+        frame_rate = audio.frame_rate
+        frame_width = audio.frame_width
+        channels = audio.channels
+
+        def export(start_ms: int, duration_ms: int, chunk_path: Path) -> None:
+            start = start_ms * frame_rate // 1000 * frame_width
+            end = (start_ms + duration_ms) * frame_rate // 1000 * frame_width
+            encoder = lameenc.Encoder()
+            encoder.set_bit_rate(self._config.output_bitrate_kbps)
+            encoder.set_in_sample_rate(frame_rate)
+            encoder.set_channels(channels)
+            encoder.set_quality(2)
+            with chunk_path.open("wb") as chunk_file:
+                chunk_file.write(encoder.encode(pcm[start:end].tobytes()))
+                chunk_file.write(encoder.flush())
+
+        return export
+
+    def _export_slices(
+        self,
+        audio_path: Path,
+        total_ms: int,
+        extension: str,
+        initial_duration_ms: int,
+        export: Callable[[int, int, Path], None],
+    ) -> Iterator[Path]:
+        """
+        Экспортирует срезы пулом потоков и отдаёт чанки в порядке следования.
+
+        Каждая задача отвечает за свой диапазон времени; если чанк превышает лимит
+        размера, задача дробит остаток диапазона, а общая длина чанка уменьшается
+        для последующих задач. В работе держится не более ``workers + 1`` задач.
+        """
+        workers = self._config.max_workers or min(4, os.cpu_count() or 1)
+        lock = threading.Lock()
+        name_counter = itertools.count(1)
+        current_duration_ms = initial_duration_ms
+
+        def export_range(range_start_ms: int, range_end_ms: int) -> list[tuple[Path, int, int]]:
+            nonlocal current_duration_ms
+            produced: list[tuple[Path, int, int]] = []
+            position_ms = range_start_ms
+            while position_ms < range_end_ms:
+                with lock:
+                    duration_ms = min(current_duration_ms, range_end_ms - position_ms)
+                    chunk_path = self._temp_dir / f"chunk_{next(name_counter)}.{extension}"
+                export(position_ms, duration_ms, chunk_path)
+
+                file_size = chunk_path.stat().st_size
+                if file_size > self._config.max_chunk_bytes:
+                    chunk_path.unlink(missing_ok=True)
+                    if duration_ms <= self._config.min_chunk_duration_ms:
+                        raise AudioChunkError("Audio chunk size exceeds limit and cannot be reduced further")
+                    with lock:
+                        current_duration_ms = min(
+                            current_duration_ms,
+                            max(
+                                int(duration_ms * self._config.duration_step_ratio),
+                                self._config.min_chunk_duration_ms,
+                            ),
+                        )
+                    logger.debug(
+                        "Chunk size too large, reducing duration",
+                        extra={
+                            "audio_path": str(audio_path),
+                            "position_ms": position_ms,
+                            "attempt_duration_ms": current_duration_ms,
+                        },
+                    )
+                    continue
+
+                produced.append((chunk_path, duration_ms, file_size))
+                position_ms += duration_ms
+            return produced
+
+        pending: deque[Future[list[tuple[Path, int, int]]]] = deque()
+        next_start_ms = 0
+        chunk_index = 0
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nvc-chunk") as executor:
+
+            def fill_queue() -> None:
+                nonlocal next_start_ms
+                while next_start_ms < total_ms and len(pending) < workers + 1:
+                    with lock:
+                        range_end_ms = min(next_start_ms + current_duration_ms, total_ms)
+                    pending.append(executor.submit(export_range, next_start_ms, range_end_ms))
+                    next_start_ms = range_end_ms
+
+            fill_queue()
+            while pending:
+                for chunk_path, duration_ms, file_size in pending.popleft().result():
+                    chunk_index += 1
+                    self._produced_files.append(chunk_path)
+                    logger.debug(
+                        "Chunk created",
+                        extra={
+                            "audio_path": str(audio_path),
+                            "chunk_index": chunk_index,
+                            "chunk_duration_ms": duration_ms,
+                            "chunk_size_bytes": file_size,
+                        },
+                    )
+                    yield chunk_path
+                fill_queue()
 
-            start_ms += chunk_duration_ms
-            chunk_index += 1
 
+def _mp3_frame_length(data: bytearray, offset: int) -> int:
+    """Длина кадра MPEG Layer III по 4-байтному заголовку в ``data[offset:]``; 0 — если это не заголовок."""
+    if data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return 0
+    version = (data[offset + 1] >> 3) & 0x03
+    layer = (data[offset + 1] >> 1) & 0x03
+    bitrate_index = data[offset + 2] >> 4
+    sample_rate_index = (data[offset + 2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return 0
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[mpeg1][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (data[offset + 2] >> 1) & 0x01
+    return (144 if mpeg1 else 72) * bitrate // sample_rate + padding
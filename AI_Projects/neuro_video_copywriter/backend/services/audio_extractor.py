@@ -1,20 +1,33 @@
 """
 @file: audio_extractor.py
 @description: Сервис извлечения аудио из видеофайлов с использованием ffmpeg.
-@dependencies: subprocess, pathlib, logging, dataclasses
+@dependencies: subprocess, hashlib, os, re, pathlib, logging, dataclasses
 @created: 2025-01-XX
 """
 
 from __future__ import annotations
 
 import dataclasses
+import hashlib
 import logging
+import os
+import re
 import subprocess
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+_FFPROBE_DURATION_ARGS = (
+    "-v",
+    "error",
+    "-show_entries",
+    "format=duration",
+    "-of",
+    "default=noprint_wrappers=1:nokey=1",
+)
+_DURATION_RE = re.compile(rb"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
 
 @dataclasses.dataclass(slots=True)
 class AudioExtractionOptions:
@@ -49,6 +62,7 @@ class AudioExtractor:
         self,
         ffmpeg_executable: str = "ffmpeg",
         workdir: Optional[Path] = None,
+        ffprobe_executable: str = "ffprobe",
     ) -> None:
         """
         Инициализация сервиса извлечения аудио.
@@ -56,8 +70,10 @@ class AudioExtractor:
         Args:
             ffmpeg_executable: Путь к исполняемому файлу ffmpeg
             workdir: Рабочая директория для временных файлов
+            ffprobe_executable: Путь к исполняемому файлу ffprobe
         """
         self._ffmpeg = ffmpeg_executable
+        self._ffprobe = ffprobe_executable
         self._workdir = workdir or Path("data/workdir")
         self._workdir.mkdir(parents=True, exist_ok=True)
 
@@ -66,14 +82,19 @@ class AudioExtractor:
         video_path: Path,
         output_path: Optional[Path] = None,
         options: Optional[AudioExtractionOptions] = None,
+        force: bool = False,
     ) -> AudioExtractionResult:
         """
         Извлекает аудио из видеофайла.
 
+        Если output_path не задан, имя файла строится из хеша исходника и опций;
+        уже извлечённый ранее файл переиспользуется без запуска ffmpeg.
+
         Args:
             video_path: Путь к исходному видеофайлу
             output_path: Путь для сохранения аудио (если None, генерируется автоматически)
             options: Опции извлечения
+            force: Извлечь заново, даже если результат уже есть в рабочей директории
 
         Returns:
             AudioExtractionResult с информацией об извлеченном аудио
@@ -86,10 +107,26 @@ class AudioExtractor:
 
         options = options or AudioExtractionOptions()
 
+        reusable = output_path is None
         if output_path is None:
-            output_path = self._workdir / f"{video_path.stem}.{options.output_format}"
+            cache_key = self._cache_key(video_path, options)
+            output_path = self._workdir / f"{video_path.stem}.{cache_key}.{options.output_format}"
+
+        if reusable and not force and output_path.is_file() and output_path.stat().st_size > 0:
+            logger.info(
+                "Reusing previously extracted audio",
+                extra={"video_path": str(video_path), "output_path": str(output_path)},
+            )
+            return AudioExtractionResult(
+                audio_path=output_path,
+                duration_seconds=self._get_video_duration(output_path),
+                sample_rate=options.sample_rate,
+                format=options.output_format,
+            )
 
         output_path.parent.mkdir(parents=True, exist_ok=True)
+        # ffmpeg пишет во временный файл: прерванный запуск не оставит «валидный» кэш
+        partial_path = output_path.with_name(f"{output_path.stem}.partial{output_path.suffix}")
 
         logger.info(
             "Extracting audio from video",
@@ -102,15 +139,20 @@ class AudioExtractor:
         )
 
         try:
-            duration = self._get_video_duration(video_path)
-            self._extract_audio(video_path, output_path, options)
+            # Длительность берём из прогресса ffmpeg, чтобы не запускать отдельный процесс
+            duration = self._extract_audio(video_path, partial_path, options)
+            os.replace(partial_path, output_path)
+            if duration is None:
+                duration = self._get_video_duration(video_path)
         except subprocess.CalledProcessError as exc:
+            partial_path.unlink(missing_ok=True)
             logger.error(
                 "FFmpeg extraction failed",
                 extra={"video_path": str(video_path), "error": str(exc)},
             )
             raise AudioExtractionError(f"FFmpeg failed: {exc}") from exc
         except Exception as exc:
+            partial_path.unlink(missing_ok=True)
             logger.error(
                 "Unexpected error during audio extraction",
                 extra={"video_path": str(video_path), "error": str(exc)},
@@ -132,15 +174,33 @@ class AudioExtractor:
             format=options.output_format,
         )
 
+    @staticmethod
+    def _cache_key(video_path: Path, options: AudioExtractionOptions) -> str:
+        """Ключ результата: путь, размер и mtime исходника плюс опции извлечения."""
+        stat = video_path.stat()
+        raw = (
+            f"{video_path}|{stat.st_size}|{stat.st_mtime_ns}|{options.codec}|"
+            f"{options.sample_rate}|{options.channels}|{options.output_format}"
+        )
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
     def _extract_audio(
         self,
         video_path: Path,
         output_path: Path,
         options: AudioExtractionOptions,
-    ) -> None:
-        """Выполняет извлечение аудио через ffmpeg."""
+    ) -> Optional[float]:
+        """
+        Выполняет извлечение аудио через ffmpeg.
+
+        Returns:
+            Длительность обработанного аудио в секундах (из ``-progress``) или None
+        """
         cmd = [
             self._ffmpeg,
+            "-nostats",
+            "-progress",
+            "pipe:1",
             "-i",
             str(video_path),
             "-vn",  # No video
@@ -166,46 +226,62 @@ class AudioExtractor:
         if result.stderr:
             logger.debug("FFmpeg stderr", extra={"stderr": result.stderr})
 
+        return self._parse_progress_duration(result.stdout)
+
+    @staticmethod
+    def _parse_progress_duration(progress: str) -> Optional[float]:
+        """Возвращает последнее значение out_time_us из вывода ``-progress`` в секундах."""
+        duration: Optional[float] = None
+        for line in progress.splitlines():
+            key, _, value = line.partition("=")
+            if key == "out_time_us":
+                try:
+                    duration = int(value) / 1_000_000
+                except ValueError:
+                    continue
+        return duration if duration and duration > 0 else None
+
     def _get_video_duration(self, video_path: Path) -> Optional[float]:
         """
-        Получает длительность видео в секундах.
+        Получает длительность видео в секундах через ffprobe (только разбор заголовков контейнера).
+
+        Если ffprobe недоступен или не вернул число, длительность читается из заголовка,
+        который печатает ``ffmpeg -i``.
 
         Returns:
             Длительность в секундах или None, если не удалось определить
         """
         try:
-            cmd = [
-                self._ffmpeg,
-                "-i",
-                str(video_path),
-                "-hide_banner",
-            ]
-
             result = subprocess.run(
-                cmd,
+                [self._ffprobe, *_FFPROBE_DURATION_ARGS, str(video_path)],
                 capture_output=True,
                 text=True,
-                check=False,  # ffmpeg возвращает код ошибки при использовании -i без вывода
+                check=True,
+            )
+            return float(result.stdout.strip())
+        except (OSError, subprocess.CalledProcessError, ValueError) as exc:
+            logger.debug(
+                "ffprobe duration lookup failed, falling back to ffmpeg header",
+                extra={"video_path": str(video_path), "error": str(exc)},
             )
 
-            # Парсим длительность из stderr
-            for line in result.stderr.split("\n"):
-                if "Duration:" in line:
-                    # Формат: Duration: HH:MM:SS.mmm
-                    parts = line.split("Duration:")[1].split(",")[0].strip()
-                    time_parts = parts.split(":")
-                    if len(time_parts) == 3:
-                        hours = float(time_parts[0])
-                        minutes = float(time_parts[1])
-                        seconds = float(time_parts[2])
-                        return hours * 3600 + minutes * 60 + seconds
-
-            logger.warning("Could not parse video duration", extra={"video_path": str(video_path)})
-            return None
-        except Exception as exc:
+        try:
+            # ffmpeg без выходного файла завершается с ошибкой, но заголовок уже напечатан в stderr
+            result = subprocess.run(
+                [self._ffmpeg, "-hide_banner", "-i", str(video_path)],
+                capture_output=True,
+                check=False,
+            )
+        except OSError as exc:
             logger.warning(
                 "Failed to get video duration",
                 extra={"video_path": str(video_path), "error": str(exc)},
             )
             return None
 
+        match = _DURATION_RE.search(result.stderr)
+        if match is None:
+            logger.warning("Could not parse video duration", extra={"video_path": str(video_path)})
+            return None
+        hours, minutes, seconds = match.groups()
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
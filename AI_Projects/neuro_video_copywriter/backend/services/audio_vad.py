@@ -0,0 +1,206 @@
+"""
+@file: backend/services/audio_vad.py
+@description: Вырезание пауз из аудио перед транскрибацией (детектор тишины ffmpeg) с пересчётом таймкодов.
+@dependencies: subprocess, bisect, re, pathlib, logging, dataclasses, ffmpeg, backend.services.transcription_cache
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import bisect
+import dataclasses
+import logging
+import re
+import subprocess
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from .transcription_cache import TranscriptionCache
+
+logger = logging.getLogger(__name__)
+
+SILENCE_THRESHOLD_DB = -35.0  # всё тише считается паузой
+MIN_SILENCE_SECONDS = 1.0  # короткие паузы между фразами не трогаем
+SPEECH_PADDING_SECONDS = 0.2  # запас вокруг речи, чтобы не срезать начало и конец слов
+MIN_GAIN_RATIO = 0.95  # если после обрезки остаётся не меньше 95% длительности, выигрыша нет
+OUTPUT_SAMPLE_RATE = 16000  # Whisper всё равно работает с моно 16 кГц
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_SILENCE_START_RE = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+_SILENCE_END_RE = re.compile(r"silence_end: (\d+(?:\.\d+)?)")
+
+
+class VADError(Exception):
+    """Ошибка при поиске или вырезании пауз."""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TrimmedAudio:
+    """Аудио без пауз и интервалы речи исходного файла, из которых оно склеено."""
+
+    path: Path
+    speech: tuple[tuple[float, float], ...]
+    original_duration: float
+    _offsets: tuple[float, ...] = dataclasses.field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        offsets = []
+        position = 0.0
+        for start, end in self.speech:
+            offsets.append(position)
+            position += end - start
+        object.__setattr__(self, "_offsets", tuple(offsets))
+
+    @property
+    def duration(self) -> float:
+        return sum(end - start for start, end in self.speech)
+
+    def to_original(self, seconds: float) -> float:
+        """Переводит время в обрезанном файле во время исходного файла."""
+        index = max(bisect.bisect_right(self._offsets, seconds) - 1, 0)
+        start, end = self.speech[index]
+        return min(start + seconds - self._offsets[index], end)
+
+    def remap_segments(self, segments: Optional[list[Any]]) -> Optional[list[dict]]:
+        """Возвращает сегменты транскрипта с таймкодами исходного файла; объекты SDK приводятся к словарям."""
+        if segments is None:
+            return None
+        remapped = []
+        for segment in segments:
+            data = dict(segment.model_dump() if hasattr(segment, "model_dump") else segment)
+            if "start" in data and "end" in data:
+                data["start"] = self.to_original(data["start"])
+                data["end"] = self.to_original(data["end"])
+            remapped.append(data)
+        return remapped
+
+
+def trim_silence(
+    audio_path: Path,
+    output_path: Path,
+    ffmpeg_executable: str = "ffmpeg",
+    cache: Optional[TranscriptionCache] = None,
+    bitrate_kbps: Optional[int] = None,
+) -> Optional[TrimmedAudio]:
+    """
+    Склеивает участки речи ``audio_path`` в ``output_path`` (моно 16 кГц, кодек по расширению).
+
+    Паузы ищет фильтр silencedetect; интервалы речи кэшируются по хэшу содержимого файла.
+    Возвращает None, если пауз почти нет (обрезка сэкономила бы меньше 5% длительности).
+
+    Raises:
+        VADError: Если ffmpeg не найден или завершился с ошибкой
+    """
+    cache_key = None
+    detected = None
+    if cache is not None:
+        cache_key = cache.make_key(
+            audio_path,
+            "vad",
+            {"threshold_db": SILENCE_THRESHOLD_DB, "min_silence": MIN_SILENCE_SECONDS, "padding": SPEECH_PADDING_SECONDS},
+        )
+        detected = cache.get(cache_key)
+
+    if detected is None:
+        duration, speech = _detect_speech(audio_path, ffmpeg_executable)
+        detected = {"duration": duration, "speech": speech}
+        if cache_key is not None:
+            cache.set(cache_key, detected)
+
+    speech = tuple((start, end) for start, end in detected["speech"])
+    trimmed = TrimmedAudio(path=output_path, speech=speech, original_duration=detected["duration"])
+    if not speech or trimmed.duration >= MIN_GAIN_RATIO * trimmed.original_duration:
+        return None
+
+    selection = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in speech)
+    cmd = [
+        ffmpeg_executable,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        str(audio_path),
+        "-vn",
+        "-af",
+        f"aselect='{selection}',asetpts=N/SR/TB",
+        "-ac",
+        "1",
+        "-ar",
+        str(OUTPUT_SAMPLE_RATE),
+    ]
+    if bitrate_kbps is not None:
+        cmd += ["-b:a", f"{bitrate_kbps}k"]
+    cmd.append(str(output_path))
+    _run_ffmpeg(cmd, ffmpeg_executable)
+
+    logger.info(
+        "Silence trimmed",
+        extra={
+            "audio_path": str(audio_path),
+            "original_seconds": f"{trimmed.original_duration:.1f}",
+            "trimmed_seconds": f"{trimmed.duration:.1f}",
+            "speech_intervals": len(speech),
+        },
+    )
+    return trimmed
+
+
+def _detect_speech(audio_path: Path, ffmpeg_executable: str) -> tuple[float, list[list[float]]]:
+    """Возвращает длительность файла и интервалы речи [start, end] с запасом SPEECH_PADDING_SECONDS."""
+    cmd = [
+        ffmpeg_executable,
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        str(audio_path),
+        "-vn",
+        "-af",
+        f"silencedetect=noise={SILENCE_THRESHOLD_DB}dB:d={MIN_SILENCE_SECONDS}",
+        "-f",
+        "null",
+        "-",
+    ]
+    output = _run_ffmpeg(cmd, ffmpeg_executable)
+
+    duration_match = _DURATION_RE.search(output)
+    if duration_match is None:
+        raise VADError(f"Cannot determine duration of {audio_path}")
+    hours, minutes, seconds = duration_match.groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    silence_starts = [max(float(value), 0.0) for value in _SILENCE_START_RE.findall(output)]
+    silence_ends = [float(value) for value in _SILENCE_END_RE.findall(output)]
+    # Тишина в конце файла может не получить silence_end
+    silence_ends += [duration] * (len(silence_starts) - len(silence_ends))
+
+    speech: list[list[float]] = []
+    position = 0.0
+    for silence_start, silence_end in zip(silence_starts, silence_ends):
+        if silence_start > position:
+            speech.append([position, silence_start])
+        position = silence_end
+    if position < duration:
+        speech.append([position, duration])
+
+    padded: list[list[float]] = []
+    for start, end in speech:
+        start = max(start - SPEECH_PADDING_SECONDS, 0.0)
+        end = min(end + SPEECH_PADDING_SECONDS, duration)
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = end
+        else:
+            padded.append([start, end])
+    return duration, padded
+
+
+def _run_ffmpeg(cmd: list[str], ffmpeg_executable: str) -> str:
+    """Запускает ffmpeg и возвращает его stderr (туда пишутся и журнал, и результаты фильтров)."""
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except FileNotFoundError as exc:
+        raise VADError(f"Executable {ffmpeg_executable} not found") from exc
+    except subprocess.CalledProcessError as exc:
+        raise VADError(f"ffmpeg failed: {exc.stderr.strip() if exc.stderr else exc}") from exc
+    return completed.stderr
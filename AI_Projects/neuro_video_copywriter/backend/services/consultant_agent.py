@@ -1,25 +1,67 @@
 """
 @file: consultant_agent.py
 @description: RAG-пайплайн для чат-консультанта с контекстом лекции.
-@dependencies: openai, backend.services.embedding_service, backend.services.vector_store
+@dependencies: openai (ленивый импорт), numpy, backend.services.openai_client, backend.services.embedding_service, backend.services.vector_store
 @created: 2025-01-XX
 """
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from typing import Optional
+import re
+from typing import AsyncIterator, Iterator, Optional
 
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None  # type: ignore
+import numpy as np
 
 from services.embedding_service import EmbeddingError, EmbeddingService
+from services.openai_client import create_async_openai_client, create_openai_client
 from services.vector_store.client import VectorStoreClient
 
 logger = logging.getLogger(__name__)
 
+QUERY_EMBEDDING_CACHE_SIZE = 512
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_NO_CONTEXT_RESPONSES = {
+    "ru": "К сожалению, я не нашел релевантной информации в базе знаний для ответа на ваш вопрос. Попробуйте переформулировать вопрос или убедитесь, что транскрипт лекции был обработан и проиндексирован.",
+    "en": "Unfortunately, I couldn't find relevant information in the knowledge base to answer your question. Try rephrasing the question or make sure the lecture transcript has been processed and indexed.",
+}
+
+_SYSTEM_PROMPTS = {
+    "ru": """Ты - помощник-консультант, который отвечает на вопросы по содержанию лекции или видео.
+Используй предоставленный контекст для формирования точного и полезного ответа.
+Если в контексте нет информации для ответа, честно скажи об этом.
+Отвечай на русском языке, будь кратким и по делу.""",
+    "en": """You are a consultant assistant that answers questions about lecture or video content.
+Use the provided context to form an accurate and helpful answer.
+If the context doesn't contain information to answer, say so honestly.
+Answer in English, be concise and to the point.""",
+}
+
+_USER_TEMPLATES = {
+    "ru": """Контекст из лекции:
+
+{context}
+
+Вопрос: {question}
+
+Ответь на вопрос, используя информацию из контекста.""",
+    "en": """Context from the lecture:
+
+{context}
+
+Question: {question}
+
+Answer the question using information from the context.""",
+}
+
+# Системные сообщения неизменны — собираем их один раз на язык
+_SYSTEM_MESSAGES = {
+    language: {"role": "system", "content": prompt} for language, prompt in _SYSTEM_PROMPTS.items()
+}
+
 
 class ConsultantError(Exception):
     """Ошибка при работе консультанта."""
@@ -48,22 +90,39 @@ class ConsultantAgent:
             llm_model: Модель LLM для генерации ответов
             base_url: Базовый URL API (опционально)
         """
-        if OpenAI is None:
-            raise ConsultantError(
-                "OpenAI library is not installed. Install it with: pip install openai"
-            )
-
         if not llm_api_key:
             raise ConsultantError("LLM API key is required")
 
         self._embedding_service = embedding_service
         self._vector_store = vector_store
-        self._llm_client = OpenAI(api_key=llm_api_key, base_url=base_url)
+        self._llm_api_key = llm_api_key
+        self._base_url = base_url
         self._llm_model = llm_model
+        self._embed_question = functools.lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._embed_question_raw)
 
         # Убеждаемся, что коллекция существует
         self._vector_store.ensure_collection(embedding_service.vector_size)
 
+    @functools.cached_property
+    def _llm_client(self):
+        """Клиент OpenAI создаётся при первой генерации ответа, а не при инициализации агента."""
+        try:
+            return create_openai_client(self._llm_api_key, self._base_url)
+        except ImportError as exc:
+            raise ConsultantError(
+                "OpenAI library is not installed. Install it with: pip install openai"
+            ) from exc
+
+    @functools.cached_property
+    def _async_llm_client(self):
+        """Асинхронный клиент OpenAI для :meth:`answer_stream_async`."""
+        try:
+            return create_async_openai_client(self._llm_api_key, self._base_url)
+        except ImportError as exc:
+            raise ConsultantError(
+                "OpenAI library is not installed. Install it with: pip install openai"
+            ) from exc
+
     def answer(
         self,
         question: str,
@@ -86,6 +145,96 @@ class ConsultantAgent:
         Raises:
             ConsultantError: При ошибке генерации ответа
         """
+        tokens, sources = self.answer_stream(question, video_id, top_k, language)
+        answer = "".join(tokens).strip()
+        if not answer:
+            raise ConsultantError("LLM generation failed: Empty response from LLM")
+
+        logger.info("Answer generated", extra={"answer_length": len(answer), "sources_count": len(sources)})
+        return (answer, sources)
+
+    async def answer_async(
+        self,
+        question: str,
+        video_id: Optional[str] = None,
+        top_k: int = 5,
+        language: str = "ru",
+    ) -> tuple[str, list[dict]]:
+        """
+        Асинхронный вариант :meth:`answer`: генерация идёт через AsyncOpenAI без занятия потока.
+
+        Raises:
+            ConsultantError: При ошибке генерации ответа
+        """
+        tokens, sources = await self.answer_stream_async(question, video_id, top_k, language)
+        answer = "".join([token async for token in tokens]).strip()
+        if not answer:
+            raise ConsultantError("LLM generation failed: Empty response from LLM")
+
+        logger.info("Answer generated", extra={"answer_length": len(answer), "sources_count": len(sources)})
+        return (answer, sources)
+
+    def answer_stream(
+        self,
+        question: str,
+        video_id: Optional[str] = None,
+        top_k: int = 5,
+        language: str = "ru",
+    ) -> tuple[Iterator[str], list[dict]]:
+        """
+        Отвечает на вопрос потоком фрагментов текста по мере генерации LLM.
+
+        Поиск контекста выполняется сразу (ошибки всплывают до начала потока),
+        генерация — лениво при итерации.
+
+        Returns:
+            Кортеж (поток фрагментов ответа, источники)
+
+        Raises:
+            ConsultantError: При ошибке поиска контекста или генерации ответа
+        """
+        retrieved = self._retrieve(question, video_id, top_k)
+        if retrieved is None:
+            return (iter((self._get_no_context_response(language),)), [])
+
+        context, sources = retrieved
+        return (self._stream_answer(question, context, language), sources)
+
+    async def answer_stream_async(
+        self,
+        question: str,
+        video_id: Optional[str] = None,
+        top_k: int = 5,
+        language: str = "ru",
+    ) -> tuple[AsyncIterator[str], list[dict]]:
+        """
+        Асинхронный вариант :meth:`answer_stream`.
+
+        Эмбеддинг (с LRU-кэшем) и поиск выполняются в пуле потоков, поток LLM читается
+        через AsyncOpenAI в event loop — один воркер обслуживает много диалогов.
+
+        Raises:
+            ConsultantError: При ошибке поиска контекста или генерации ответа
+        """
+        retrieved = await asyncio.to_thread(self._retrieve, question, video_id, top_k)
+        if retrieved is None:
+            return (_single_token(self._get_no_context_response(language)), [])
+
+        context, sources = retrieved
+        return (self._stream_answer_async(question, context, language), sources)
+
+    def _retrieve(
+        self,
+        question: str,
+        video_id: Optional[str],
+        top_k: int,
+    ) -> Optional[tuple[str, list[dict]]]:
+        """
+        Находит фрагменты для ответа.
+
+        Returns:
+            Кортеж (контекст, источники) или None, если релевантных фрагментов нет
+        """
         if not question or not question.strip():
             raise ConsultantError("Question is empty")
 
@@ -95,40 +244,18 @@ class ConsultantAgent:
         )
 
         try:
-            # 1. Генерируем эмбеддинг для вопроса
-            query_embedding = self._embedding_service.generate(question)
+            # 1. Генерируем эмбеддинг для вопроса (повторные вопросы берутся из LRU-кэша)
+            query_embedding = self._embed_question(self._normalize_question(question))
 
-            # 2. Ищем релевантные фрагменты в векторном хранилище
-            search_results = self._vector_store.search(query_embedding, top_k=top_k)
+            # 2. Ищем релевантные фрагменты в векторном хранилище (фильтр по video_id — на стороне Qdrant)
+            search_results = self._vector_store.search(query_embedding, top_k=top_k, video_id=video_id)
 
             if not search_results:
-                logger.warning("No relevant context found", extra={"question": question})
-                return (self._get_no_context_response(language), [])
-
-            # 3. Фильтруем результаты по video_id если указан
-            filtered_results = search_results
-            if video_id:
-                filtered_results = [
-                    r for r in search_results
-                    if r.get("payload", {}).get("video_id") == video_id
-                ]
-
-            if not filtered_results:
-                logger.warning("No relevant context found for video", extra={"question": question, "video_id": video_id})
-                return (self._get_no_context_response(language), [])
-
-            # 4. Формируем контекст из найденных фрагментов
-            context = self._build_context(filtered_results, video_id)
-
-            # 5. Генерируем ответ через LLM с контекстом
-            answer = self._generate_answer(question, context, language)
-
-            # 6. Формируем источники
-            sources = self._format_sources(filtered_results)
-
-            logger.info("Answer generated", extra={"answer_length": len(answer), "sources_count": len(sources)})
+                logger.warning("No relevant context found", extra={"question": question, "video_id": video_id})
+                return None
 
-            return (answer, sources)
+            # 3. Формируем контекст и источники из найденных фрагментов
+            return (self._build_context(search_results), self._format_sources(search_results))
         except EmbeddingError as exc:
             logger.error("Embedding error", extra={"error": str(exc)})
             raise ConsultantError(f"Embedding error: {exc}") from exc
@@ -136,7 +263,18 @@ class ConsultantAgent:
             logger.error("Consultant error", extra={"error": str(exc), "question": question})
             raise ConsultantError(f"Failed to generate answer: {exc}") from exc
 
-    def _build_context(self, search_results: list[dict], video_id: Optional[str]) -> str:
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        """Нормализует вопрос для ключа кэша: регистр и пробелы."""
+        return _WHITESPACE_RE.sub(" ", question.strip().lower())
+
+    def _embed_question_raw(self, normalized_question: str) -> np.ndarray:
+        """Запрашивает эмбеддинг вопроса; float32-вектор в кэше защищён от записи."""
+        embedding = self._embedding_service.generate(normalized_question)
+        embedding.flags.writeable = False
+        return embedding
+
+    def _build_context(self, search_results: list[dict]) -> str:
         """Строит контекст из результатов поиска."""
         context_parts = []
         for i, result in enumerate(search_results, 1):
@@ -145,9 +283,6 @@ class ConsultantAgent:
             metadata = payload.get("metadata", {})
             timestamp = metadata.get("timestamp") or metadata.get("start_time")
 
-            if video_id and payload.get("video_id") != video_id:
-                continue
-
             part = f"[Фрагмент {i}]"
             if timestamp:
                 part += f" (время: {timestamp})"
@@ -156,59 +291,59 @@ class ConsultantAgent:
 
         return "\n\n".join(context_parts)
 
-    def _generate_answer(self, question: str, context: str, language: str) -> str:
-        """Генерирует ответ через LLM с использованием контекста."""
-        if language == "ru":
-            system_prompt = """Ты - помощник-консультант, который отвечает на вопросы по содержанию лекции или видео.
-Используй предоставленный контекст для формирования точного и полезного ответа.
-Если в контексте нет информации для ответа, честно скажи об этом.
-Отвечай на русском языке, будь кратким и по делу."""
-            user_prompt = f"""Контекст из лекции:
-
-{context}
-
-Вопрос: {question}
-
-Ответь на вопрос, используя информацию из контекста."""
-        else:
-            system_prompt = """You are a consultant assistant that answers questions about lecture or video content.
-Use the provided context to form an accurate and helpful answer.
-If the context doesn't contain information to answer, say so honestly.
-Answer in English, be concise and to the point."""
-            user_prompt = f"""Context from the lecture:
-
-{context}
-
-Question: {question}
+    def _stream_answer(self, question: str, context: str, language: str) -> Iterator[str]:
+        """Генерирует ответ через LLM с использованием контекста, отдавая фрагменты по мере поступления."""
+        try:
+            stream = self._llm_client.chat.completions.create(
+                model=self._llm_model,
+                messages=self._build_messages(question, context, language),
+                temperature=0.7,
+                max_tokens=500,
+                stream=True,
+            )
 
-Answer the question using information from the context."""
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    yield piece
+        except Exception as exc:
+            logger.error("LLM generation failed", extra={"error": str(exc)})
+            raise ConsultantError(f"LLM generation failed: {exc}") from exc
 
+    async def _stream_answer_async(self, question: str, context: str, language: str) -> AsyncIterator[str]:
+        """Асинхронный вариант :meth:`_stream_answer` поверх AsyncOpenAI."""
         try:
-            response = self._llm_client.chat.completions.create(
+            stream = await self._async_llm_client.chat.completions.create(
                 model=self._llm_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
+                messages=self._build_messages(question, context, language),
                 temperature=0.7,
                 max_tokens=500,
+                stream=True,
             )
 
-            answer = response.choices[0].message.content
-            if not answer:
-                raise ConsultantError("Empty response from LLM")
-
-            return answer.strip()
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    yield piece
         except Exception as exc:
             logger.error("LLM generation failed", extra={"error": str(exc)})
             raise ConsultantError(f"LLM generation failed: {exc}") from exc
 
+    @staticmethod
+    def _build_messages(question: str, context: str, language: str) -> list[dict]:
+        language = language if language in _SYSTEM_PROMPTS else "en"
+        return [
+            _SYSTEM_MESSAGES[language],
+            {"role": "user", "content": _USER_TEMPLATES[language].format(context=context, question=question)},
+        ]
+
     def _get_no_context_response(self, language: str) -> str:
         """Возвращает ответ, когда контекст не найден."""
-        if language == "ru":
-            return "К сожалению, я не нашел релевантной информации в базе знаний для ответа на ваш вопрос. Попробуйте переформулировать вопрос или убедитесь, что транскрипт лекции был обработан и проиндексирован."
-        else:
-            return "Unfortunately, I couldn't find relevant information in the knowledge base to answer your question. Try rephrasing the question or make sure the lecture transcript has been processed and indexed."
+        return _NO_CONTEXT_RESPONSES["ru" if language == "ru" else "en"]
 
     def _format_sources(self, search_results: list[dict]) -> list[dict]:
         """Форматирует источники для ответа."""
@@ -226,3 +361,6 @@ Answer the question using information from the context."""
             sources.append(source)
         return sources
 
+
+async def _single_token(text: str) -> AsyncIterator[str]:
+    yield text
@@ -1,22 +1,49 @@
 """
 @file: embedding_service.py
 @description: Сервис генерации эмбеддингов для текста с использованием OpenAI API.
-@dependencies: openai, logging
+@dependencies: openai (ленивый импорт), backend.services.openai_client, backend.utils.resilience, numpy, base64, tiktoken (опционально), concurrent.futures, logging
 @created: 2025-01-XX
 """
 
 from __future__ import annotations
 
+import base64
+import functools
 import logging
-from typing import Optional
+from collections.abc import KeysView
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Final, Mapping, Optional
+
+import numpy as np
 
 try:
-    from openai import OpenAI
+    import tiktoken
 except ImportError:
-    OpenAI = None  # type: ignore
+    tiktoken = None  # type: ignore
+
+from services.openai_client import create_openai_client, is_transient_openai_error
+from utils.resilience import CircuitBreaker, CircuitOpenError, call_with_retry
 
 logger = logging.getLogger(__name__)
 
+MAX_TOKENS_PER_REQUEST = 200_000  # запас до лимита OpenAI в 300k токенов на запрос
+MAX_TOKENS_PER_INPUT = 8191  # лимит OpenAI на один текст: более длинный отклоняет весь запрос
+MAX_ITEMS_PER_REQUEST = 96
+DEFAULT_CONCURRENCY = 8
+DEFAULT_VECTOR_SIZE = 1536
+MAX_ATTEMPTS = 6
+BREAKER_FAIL_MAX = 10
+BREAKER_RESET_TIMEOUT = 60.0
+
+_VECTOR_SIZES: Final[Mapping[str, int]] = MappingProxyType(
+    {
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+        "text-embedding-ada-002": 1536,
+    }
+)
+
 
 class EmbeddingError(Exception):
     """Ошибка при генерации эмбеддингов."""
@@ -32,6 +59,7 @@ class EmbeddingService:
         api_key: str,
         model: str = "text-embedding-3-small",
         base_url: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
     ) -> None:
         """
         Инициализация сервиса генерации эмбеддингов.
@@ -40,34 +68,59 @@ class EmbeddingService:
             api_key: API ключ OpenAI
             model: Модель для генерации эмбеддингов (text-embedding-3-small, text-embedding-3-large, text-embedding-ada-002)
             base_url: Базовый URL API (опционально)
+            concurrency: Максимальное число параллельных запросов к API
         """
-        if OpenAI is None:
-            raise EmbeddingError(
-                "OpenAI library is not installed. Install it with: pip install openai"
-            )
-
         if not api_key:
             raise EmbeddingError("OpenAI API key is required")
 
-        self._client = OpenAI(api_key=api_key, base_url=base_url)
+        self._api_key = api_key
+        self._base_url = base_url
+        self._concurrency = max(1, concurrency)
+        # 4xx (кроме 429) — ошибка запроса, а не недоступность API: размыкать цепь из-за них нельзя
+        self._breaker = CircuitBreaker(
+            fail_max=BREAKER_FAIL_MAX,
+            reset_timeout=BREAKER_RESET_TIMEOUT,
+            is_failure=is_transient_openai_error,
+        )
         self._model = model
         self._vector_size = self._get_vector_size(model)
+        self._encoding = self._get_encoding(model)
+
+    @functools.cached_property
+    def _client(self):
+        """Клиент OpenAI создаётся при первом запросе к API, а не при инициализации сервиса."""
+        try:
+            # Повторы выполняет сам сервис (с backoff и circuit breaker), встроенные в SDK отключены
+            return create_openai_client(self._api_key, self._base_url, max_retries=0)
+        except ImportError as exc:
+            raise EmbeddingError(
+                "OpenAI library is not installed. Install it with: pip install openai"
+            ) from exc
+
+    @classmethod
+    def known_models(cls) -> KeysView[str]:
+        """Модели с известной размерностью вектора (для валидации настроек без экземпляра)."""
+        return _VECTOR_SIZES.keys()
 
     def _get_vector_size(self, model: str) -> int:
         """Возвращает размерность вектора для модели."""
-        sizes = {
-            "text-embedding-3-small": 1536,
-            "text-embedding-3-large": 3072,
-            "text-embedding-ada-002": 1536,
-        }
-        return sizes.get(model, 1536)
+        return _VECTOR_SIZES.get(model, DEFAULT_VECTOR_SIZE)
+
+    def _get_encoding(self, model: str):
+        """Возвращает токенайзер модели или None, если tiktoken не установлен."""
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
 
     @property
     def vector_size(self) -> int:
         """Размерность вектора эмбеддинга."""
         return self._vector_size
 
-    def generate(self, text: str) -> list[float]:
+    def generate(self, text: str) -> np.ndarray:
         """
         Генерирует эмбеддинг для текста.
 
@@ -75,7 +128,7 @@ class EmbeddingService:
             text: Текст для векторизации
 
         Returns:
-            Список чисел (вектор эмбеддинга)
+            Вектор эмбеддинга единичной длины (numpy.ndarray, float32)
 
         Raises:
             EmbeddingError: При ошибке генерации
@@ -85,21 +138,11 @@ class EmbeddingService:
 
         logger.debug("Generating embedding", extra={"text_length": len(text), "model": self._model})
 
-        try:
-            response = self._client.embeddings.create(
-                model=self._model,
-                input=text,
-            )
-
-            embedding = response.data[0].embedding
-            logger.debug("Embedding generated", extra={"vector_size": len(embedding)})
-
-            return embedding
-        except Exception as exc:
-            logger.error("Embedding generation failed", extra={"error": str(exc), "text_length": len(text)})
-            raise EmbeddingError(f"Embedding generation failed: {exc}") from exc
+        embedding = l2_normalize(self.generate_many([text])[0])
+        logger.debug("Embedding generated", extra={"vector_size": embedding.shape[0]})
+        return embedding
 
-    def generate_batch(self, texts: list[str]) -> list[list[float]]:
+    def generate_batch(self, texts: list[str]) -> np.ndarray:
         """
         Генерирует эмбеддинги для списка текстов.
 
@@ -107,27 +150,142 @@ class EmbeddingService:
             texts: Список текстов для векторизации
 
         Returns:
-            Список векторов эмбеддингов
+            Матрица float32 формы (N, D); строки нормированы к единичной длине
 
         Raises:
             EmbeddingError: При ошибке генерации
         """
         if not texts:
-            return []
+            return np.empty((0, self._vector_size), dtype=np.float32)
 
         logger.debug("Generating batch embeddings", extra={"batch_size": len(texts), "model": self._model})
 
-        try:
-            response = self._client.embeddings.create(
-                model=self._model,
-                input=texts,
-            )
+        embeddings = l2_normalize(self.generate_many(texts))
+        logger.debug("Batch embeddings generated", extra={"count": embeddings.shape[0]})
+        return embeddings
+
+    def generate_many(
+        self,
+        texts: list[str],
+        max_tokens_per_request: int = MAX_TOKENS_PER_REQUEST,
+        max_items_per_request: int = MAX_ITEMS_PER_REQUEST,
+        concurrency: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Генерирует эмбеддинги, упаковывая тексты в запросы по бюджету токенов.
 
-            embeddings = [item.embedding for item in response.data]
-            logger.debug("Batch embeddings generated", extra={"count": len(embeddings)})
+        Подзапросы выполняются параллельно, порядок результатов совпадает с порядком входа.
+        Тексты длиннее MAX_TOKENS_PER_INPUT обрезаются до лимита.
 
-            return embeddings
+        Args:
+            texts: Список текстов для векторизации
+            max_tokens_per_request: Максимум токенов в одном запросе
+            max_items_per_request: Максимум текстов в одном запросе
+            concurrency: Число параллельных запросов (по умолчанию — из настроек сервиса)
+
+        Returns:
+            Матрица float32 формы (N, D) без нормировки — как её вернул API
+
+        Raises:
+            EmbeddingError: При ошибке генерации
+        """
+        if not texts:
+            return np.empty((0, self._vector_size), dtype=np.float32)
+
+        fitted = [self._fit_input(text) for text in texts]
+        truncated = sum(1 for fitted_text, text in zip(fitted, texts) if fitted_text[0] is not text)
+        if truncated:
+            logger.warning(
+                "Embedding inputs truncated to token limit",
+                extra={"truncated": truncated, "max_tokens": MAX_TOKENS_PER_INPUT},
+            )
+        texts = [text for text, _ in fitted]
+        batches = self._pack_batches([tokens for _, tokens in fitted], max_tokens_per_request, max_items_per_request)
+        workers = min(concurrency or self._concurrency, len(batches))
+        self._client  # создаём клиент до запуска потоков, чтобы не собрать его дважды
+
+        try:
+            if workers <= 1:
+                results = [self._request_embeddings(texts[start:end]) for start, end in batches]
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nvc-embed") as executor:
+                    futures = [executor.submit(self._request_embeddings, texts[start:end]) for start, end in batches]
+                    results = [future.result() for future in futures]
         except Exception as exc:
-            logger.error("Batch embedding generation failed", extra={"error": str(exc), "batch_size": len(texts)})
-            raise EmbeddingError(f"Batch embedding generation failed: {exc}") from exc
+            logger.error(
+                "Embedding generation failed",
+                extra={"error": str(exc), "batch_size": len(texts), "requests": len(batches)},
+            )
+            raise EmbeddingError(f"Embedding generation failed: {exc}") from exc
 
+        return results[0] if len(results) == 1 else np.concatenate(results)
+
+    def _pack_batches(
+        self,
+        token_counts: list[int],
+        max_tokens_per_request: int,
+        max_items_per_request: int,
+    ) -> list[tuple[int, int]]:
+        """Жадно группирует подряд идущие тексты (по числу их токенов) в диапазоны [start, end) под лимиты запроса."""
+        batches: list[tuple[int, int]] = []
+        start = 0
+        tokens_in_batch = 0
+        for index, tokens in enumerate(token_counts):
+            items_in_batch = index - start
+            if items_in_batch and (
+                tokens_in_batch + tokens > max_tokens_per_request or items_in_batch >= max_items_per_request
+            ):
+                batches.append((start, index))
+                start = index
+                tokens_in_batch = 0
+            tokens_in_batch += tokens
+        batches.append((start, len(token_counts)))
+        return batches
+
+    def _fit_input(self, text: str) -> tuple[str, int]:
+        """Возвращает текст, обрезанный до MAX_TOKENS_PER_INPUT, и число его токенов."""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= MAX_TOKENS_PER_INPUT:
+                return text, len(tokens)
+            # Срез может разрезать многобайтовый символ — его остаток декодируется в U+FFFD
+            return self._encoding.decode(tokens[:MAX_TOKENS_PER_INPUT]).rstrip("\ufffd"), MAX_TOKENS_PER_INPUT
+        # Консервативная оценка без tiktoken: для кириллицы ~2 символа на токен
+        tokens = len(text) // 2 + 1
+        if tokens <= MAX_TOKENS_PER_INPUT:
+            return text, tokens
+        return text[: (MAX_TOKENS_PER_INPUT - 1) * 2], MAX_TOKENS_PER_INPUT
+
+    def _request_embeddings(self, texts: list[str]) -> np.ndarray:
+        """Запрос к API с повторами на 429/5xx/таймаутах; при серии сбоев breaker отклоняет вызовы сразу."""
+        response = call_with_retry(
+            lambda: self._breaker.call(
+                # base64 — сырые float32 little-endian: вектор не разбирается из JSON в список Python float
+                lambda: self._client.embeddings.create(model=self._model, input=texts, encoding_format="base64")
+            ),
+            is_retryable=_is_transient_error,
+            max_attempts=MAX_ATTEMPTS,
+        )
+        items = sorted(response.data, key=lambda item: item.index)
+        return np.stack([np.frombuffer(base64.b64decode(item.embedding), dtype="<f4") for item in items]).astype(
+            np.float32, copy=False
+        )
+
+
+def _is_transient_error(exc: BaseException) -> bool:
+    """Временные ошибки OpenAI: лимит запросов, таймаут, обрыв соединения, 5xx."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    return is_transient_openai_error(exc)
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Нормирует вектор (или строки матрицы) к единичной длине.
+
+    Для единичных векторов косинусная близость равна скалярному произведению,
+    поэтому коллекция Qdrant использует метрику Dot без нормировки при поиске.
+    """
+    norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+    norms = np.where(norms > 0, norms, 1.0).astype(vectors.dtype, copy=False)
+    return vectors / norms[..., np.newaxis]
@@ -0,0 +1,122 @@
+"""
+@file: backend/services/openai_client.py
+@description: Ленивое создание клиентов OpenAI поверх общего пула HTTP-соединений.
+@dependencies: openai, httpx
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+SHARED_POOL_SIZE = 32
+
+
+def build_http_client(
+    max_connections: int = SHARED_POOL_SIZE,
+    max_keepalive_connections: Optional[int] = None,
+    read_timeout: float = 60.0,
+) -> "httpx.Client":
+    """Создаёт httpx.Client с keep-alive пулом; TLS-рукопожатие амортизируется между запросами."""
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections or max_connections,
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=5.0),
+    )
+
+
+def build_async_http_client(
+    max_connections: int = SHARED_POOL_SIZE,
+    read_timeout: float = 60.0,
+) -> "httpx.AsyncClient":
+    """
+    Создаёт httpx.AsyncClient с keep-alive пулом.
+
+    Соединения привязаны к event loop, в котором открыты: клиент для asyncio.run()
+    создаётся внутри этого вызова и закрывается до его завершения.
+    """
+    import httpx
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=5.0),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def shared_http_client() -> "httpx.Client":
+    """Один keep-alive пул соединений на процесс для всех синхронных клиентов OpenAI."""
+    return build_http_client()
+
+
+@functools.lru_cache(maxsize=1)
+def shared_async_http_client() -> "httpx.AsyncClient":
+    """Общий пул соединений для асинхронных клиентов OpenAI (используется из event loop приложения)."""
+    return build_async_http_client()
+
+
+def create_openai_client(
+    api_key: str,
+    base_url: Optional[str] = None,
+    http_client: Optional["httpx.Client"] = None,
+    **kwargs: Any,
+) -> "OpenAI":
+    """
+    Создаёт клиент OpenAI, импортируя SDK только в момент первого обращения.
+
+    Args:
+        http_client: Собственный пул соединений (по умолчанию — общий пул процесса)
+
+    Raises:
+        ImportError: Если библиотека openai не установлена
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client or shared_http_client(), **kwargs)
+
+
+def create_async_openai_client(
+    api_key: str,
+    base_url: Optional[str] = None,
+    http_client: Optional["httpx.AsyncClient"] = None,
+    **kwargs: Any,
+) -> "AsyncOpenAI":
+    """
+    Создаёт AsyncOpenAI поверх общего асинхронного пула соединений.
+
+    Args:
+        http_client: Собственный пул соединений (по умолчанию — общий пул event loop приложения)
+
+    Raises:
+        ImportError: Если библиотека openai не установлена
+    """
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=http_client or shared_async_http_client(),
+        **kwargs,
+    )
+
+
+def is_transient_openai_error(exc: BaseException) -> bool:
+    """Временные ошибки OpenAI, которые имеет смысл повторить: лимит запросов, таймаут, обрыв соединения, 5xx."""
+    import openai
+
+    return isinstance(
+        exc,
+        (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError),
+    )
@@ -10,7 +10,7 @@ from __future__ import annotations
 import abc
 import dataclasses
 from pathlib import Path
-from typing import Any, Mapping
+from typing import Any, Mapping, Sequence
 
 
 DEFAULT_EXECUTABLE = "yt-dlp"
@@ -32,9 +32,12 @@ class BaseProviderAdapter(abc.ABC):
     """Абстрактный адаптер для загрузки медиаконтента из внешних источников."""
 
     name: str
+    # Хосты (без "www."), которые адаптер обслуживает: по ним оркестратор выбирает адаптер без вызова supports()
+    supported_hosts: tuple[str, ...] = ()
 
-    def __init__(self, executable: str = DEFAULT_EXECUTABLE) -> None:
+    def __init__(self, executable: str = DEFAULT_EXECUTABLE, executable_args: Sequence[str] = ()) -> None:
         self._executable = executable or DEFAULT_EXECUTABLE
+        self._executable_args = tuple(executable_args)
 
     @abc.abstractmethod
     def supports(self, url: str) -> bool:
@@ -56,3 +59,12 @@ class BaseProviderAdapter(abc.ABC):
         """Возвращает путь к исполняемому файлу yt-dlp."""
         return self._executable
 
+    @property
+    def executable_args(self) -> tuple[str, ...]:
+        """
+        Общие аргументы yt-dlp, которые идут сразу после исполняемого файла в команде загрузки.
+
+        Аргументы адаптера стоят дальше и при совпадении флагов имеют приоритет.
+        """
+        return self._executable_args
+
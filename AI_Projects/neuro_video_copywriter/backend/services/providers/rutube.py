@@ -22,6 +22,7 @@ class RuTubeAdapter(BaseProviderAdapter):
     """Адаптер загрузки видео с RuTube."""
 
     name = "rutube"
+    supported_hosts = ("rutube.ru", "m.rutube.ru")
 
     def supports(self, url: str) -> bool:
         return "rutube.ru" in url.lower()
@@ -34,6 +35,7 @@ class RuTubeAdapter(BaseProviderAdapter):
         output_template = temp_dir / "%(id)s.%(ext)s"
         command = [
             self.executable,
+            *self.executable_args,
             "--format",
             "bestaudio/best",
             "--no-playlist",
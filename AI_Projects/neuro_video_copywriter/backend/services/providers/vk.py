@@ -1,64 +1,190 @@
 """
 @file: backend/services/providers/vk.py
 @description: Адаптер загрузки медиаконтента из VK видео.
-@dependencies: backend.services.providers.base, logging, pathlib
+@dependencies: backend.services.providers.base, backend.utils.cache, backend.utils.json_codec, yt_dlp (метаданные в процессе), asyncio, concurrent.futures, logging, pathlib
 @created: 2025-11-12
 """
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import logging
+import os
+import re
 import subprocess
 import tempfile
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Sequence
 from uuid import uuid4
 
-from .base import BaseProviderAdapter, DownloadResult, ProviderError
+try:
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import DownloadError
+except ImportError:
+    YoutubeDL = None  # type: ignore
+
+from utils import json_codec
+from utils.cache import StaleWhileRevalidateCache
+
+from .base import DEFAULT_EXECUTABLE, BaseProviderAdapter, DownloadResult, ProviderError
 
 logger = logging.getLogger(__name__)
 
+_METADATA_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "noplaylist": True,
+    "skip_download": True,
+}
+
+DEFAULT_DOWNLOAD_WORKERS = 4  # одновременных процессов yt-dlp в download_many, чтобы не упереться в rate limit VK
+MAX_CONCURRENT_ASYNC_DOWNLOADS = 8  # тот же смысл для download_async, в пределах одного event loop
+# asyncio.Semaphore привязывается к циклу, в котором его впервые ждут, а циклов в процессе несколько
+_async_download_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+_async_download_slots_lock = threading.Lock()
+
+INFO_JSON_SUFFIX = ".info.json"
+# Поиск подстроки без учёта регистра — как прежняя проверка по lower(), но без копии URL
+_VK_DOMAIN_RE = re.compile(r"vk\.com|vkvideo\.ru", re.IGNORECASE)
+METADATA_TIMEOUT = 60.0
+
+METADATA_CACHE_TTL = 3600.0
+METADATA_CACHE_SIZE = 2048
+_METADATA_CACHE_VERSION = 0
+# Метаданные — функция URL; общий для всех экземпляров адаптера кэш снимает повторные запросы
+_metadata_cache: StaleWhileRevalidateCache[dict] = StaleWhileRevalidateCache(
+    ttl=METADATA_CACHE_TTL,
+    stale_ttl=0.0,
+    maxsize=METADATA_CACHE_SIZE,
+)
+
 
 class VkAdapter(BaseProviderAdapter):
     """Адаптер загрузки видео с платформы VK."""
 
     name = "vk"
+    supported_hosts = ("vk.com", "m.vk.com", "vkvideo.ru", "m.vkvideo.ru")
+
+    def __init__(self, executable: str = DEFAULT_EXECUTABLE, executable_args: Sequence[str] = ()) -> None:
+        super().__init__(executable, executable_args)
+        self._ydl = YoutubeDL(dict(_METADATA_OPTIONS)) if YoutubeDL is not None else None
+        # Экземпляр YoutubeDL хранит состояние между вызовами — сериализуем доступ
+        self._ydl_lock = threading.Lock()
+        # Каталоги назначения, уже созданные этим адаптером: mkdir не повторяется на каждую загрузку
+        self._ensured_dirs: set[Path] = set()
 
     def supports(self, url: str) -> bool:
-        normalized = url.strip().lstrip("@").lower()
-        return any(domain in normalized for domain in ("vk.com", "vkvideo.ru"))
+        return _VK_DOMAIN_RE.search(url) is not None
 
     def download(self, url: str, destination: Path) -> DownloadResult:
         sanitized_url = self.sanitize_url(url)
         logger.info("Starting VK download", extra={"url": sanitized_url})
 
-        temp_dir = Path(tempfile.mkdtemp(prefix="vk-yt-dlp-", dir=str(destination)))
+        with self._temporary_dir(destination) as temp_name:
+            temp_dir = Path(temp_name)
+            self._run_command(self._download_command(sanitized_url, temp_dir))
+            target_path, metadata = self._collect_download(sanitized_url, temp_dir, destination)
+        if metadata is None:
+            metadata = self._fetch_metadata(sanitized_url)
+        return DownloadResult(video_path=target_path, metadata=metadata)
+
+    def download_many(
+        self,
+        urls: list[str],
+        destination: Path,
+        max_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    ) -> list[DownloadResult]:
+        """
+        Загружает несколько видео параллельно; результаты — в порядке входных URL.
+
+        Каждая загрузка работает в своём временном каталоге; число одновременных
+        загрузок ограничено только размером пула ``max_workers``.
+
+        Raises:
+            ProviderError: Первая ошибка среди загрузок
+        """
+        if not urls:
+            return []
+        if max_workers <= 0:
+            raise ValueError("max_workers must be positive")
+
+        workers = min(max_workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nvc-vk-download") as executor:
+            return list(executor.map(lambda url: self.download(url, destination), urls))
+
+    async def download_async(self, url: str, destination: Path) -> DownloadResult:
+        """
+        Асинхронный вариант download: yt-dlp запускается через asyncio.create_subprocess_exec.
+
+        Один event loop ведёт много загрузок без выделенного потока на каждую;
+        метаданные приходят тем же проходом (--write-info-json). При отмене задачи
+        процесс yt-dlp завершается.
+
+        Raises:
+            ProviderError: При ошибке загрузки
+        """
+        sanitized_url = self.sanitize_url(url)
+        logger.info("Starting VK download", extra={"url": sanitized_url})
+
+        async with _loop_download_slots():
+            with self._temporary_dir(destination) as temp_name:
+                temp_dir = Path(temp_name)
+                await self._run_command_async(self._download_command(sanitized_url, temp_dir))
+                target_path, metadata = self._collect_download(sanitized_url, temp_dir, destination)
+        if metadata is None:
+            metadata = await asyncio.to_thread(self._fetch_metadata, sanitized_url)
+        return DownloadResult(video_path=target_path, metadata=metadata)
+
+    @staticmethod
+    def _temporary_dir(destination: Path) -> tempfile.TemporaryDirectory:
+        """Каталог для вывода yt-dlp; удаляется при выходе из with (и финализатором при сбое процесса)."""
+        return tempfile.TemporaryDirectory(prefix="vk-yt-dlp-", dir=str(destination), ignore_cleanup_errors=True)
+
+    def _download_command(self, sanitized_url: str, temp_dir: Path) -> list[str]:
         output_template = temp_dir / "%(id)s.%(ext)s"
-        command = [
+        return [
             self.executable,
+            *self.executable_args,
             "--format",
             "bestaudio/best",
             "--no-playlist",
             "--newline",
+            # Метаданные пишутся тем же проходом в <id>.info.json — второй запуск yt-dlp не нужен
+            "--write-info-json",
             "--output",
             str(output_template),
             sanitized_url,
         ]
 
-        try:
-            self._run_command(command)
-            downloaded_files = list(temp_dir.glob("*"))
-            if not downloaded_files:
-                raise ProviderError("yt-dlp did not produce any files for VK source")
+    def _collect_download(
+        self,
+        sanitized_url: str,
+        temp_dir: Path,
+        destination: Path,
+    ) -> tuple[Path, dict | None]:
+        """Переносит скачанный файл в destination; метаданные — из .info.json, если он прочитался."""
+        info_files = [path for path in temp_dir.glob("*") if path.name.endswith(INFO_JSON_SUFFIX)]
+        downloaded_files = [path for path in temp_dir.glob("*") if not path.name.endswith(INFO_JSON_SUFFIX)]
+        if not downloaded_files:
+            raise ProviderError("yt-dlp did not produce any files for VK source")
 
-            video_file = downloaded_files[0]
-            target_path = destination / f"{uuid4().hex}{video_file.suffix}"
-            target_path.parent.mkdir(parents=True, exist_ok=True)
-            video_file.replace(target_path)
+        video_file = downloaded_files[0]
+        if destination not in self._ensured_dirs:
+            destination.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(destination)
+        target_path = destination / f"{uuid4().hex}{video_file.suffix}"
+        os.replace(video_file, target_path)
 
-            metadata = self._fetch_metadata(sanitized_url)
-            return DownloadResult(video_path=target_path, metadata=metadata)
-        finally:
-            self._cleanup_temp_dir(temp_dir)
+        metadata = self._read_info_json(info_files[0]) if info_files else None
+        if metadata is not None:
+            _metadata_cache.set(sanitized_url, metadata, _METADATA_CACHE_VERSION)
+        return target_path, metadata
 
     def _run_command(self, command: list[str]) -> None:
         try:
@@ -74,7 +200,65 @@ class VkAdapter(BaseProviderAdapter):
         except subprocess.CalledProcessError as exc:
             raise ProviderError(f"yt-dlp failed with code {exc.returncode}") from exc
 
+    async def _run_command_async(self, command: list[str]) -> None:
+        try:
+            process = await asyncio.create_subprocess_exec(*command)
+        except FileNotFoundError as exc:
+            raise ProviderError(
+                f"Executable {self.executable} not found. Install yt-dlp."
+            ) from exc
+
+        try:
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            # Отменённая задача не должна оставлять yt-dlp работать в фоне
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+            await process.wait()
+            raise
+        if returncode != 0:
+            raise ProviderError(f"yt-dlp failed with code {returncode}")
+
+    @staticmethod
+    def _extract_metadata(raw_data: dict) -> dict:
+        return {
+            "title": raw_data.get("title"),
+            "uploader": raw_data.get("uploader"),
+            "duration": raw_data.get("duration"),
+        }
+
+    def _read_info_json(self, info_path: Path) -> dict | None:
+        """Читает метаданные из .info.json, записанного yt-dlp при загрузке."""
+        try:
+            return self._extract_metadata(json_codec.loads(info_path.read_bytes()))
+        except (OSError, ValueError):
+            logger.warning("Cannot read yt-dlp info json", extra={"file": str(info_path)})
+            return None
+
     def _fetch_metadata(self, url: str) -> dict:
+        cached, _ = _metadata_cache.get(url, _METADATA_CACHE_VERSION)
+        if cached is not None:
+            return dict(cached)
+
+        metadata = self._fetch_metadata_uncached(url)
+        _metadata_cache.set(url, metadata, _METADATA_CACHE_VERSION)
+        return dict(metadata)
+
+    def _fetch_metadata_uncached(self, url: str) -> dict:
+        if self._ydl is None:
+            return self._fetch_metadata_subprocess(url)
+
+        try:
+            with self._ydl_lock:
+                raw_data = self._ydl.extract_info(url, download=False)
+        except DownloadError as exc:
+            logger.warning("Failed to fetch metadata via yt-dlp for VK", extra={"url": url})
+            raise ProviderError("Cannot fetch metadata for VK source") from exc
+
+        return self._extract_metadata(raw_data)
+
+    def _fetch_metadata_subprocess(self, url: str) -> dict:
+        """Запасной путь, если пакет yt_dlp не импортируется: отдельный процесс с --dump-json."""
         command = [
             self.executable,
             "--dump-json",
@@ -82,34 +266,29 @@ class VkAdapter(BaseProviderAdapter):
             "--no-playlist",
             url,
         ]
-        try:
-            result = subprocess.run(
-                command,
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-        except subprocess.CalledProcessError as exc:
+        # stdout читается байтами и отдаётся парсеру без декодирования в str; stderr не нужен
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+            try:
+                stdout, _ = process.communicate(timeout=METADATA_TIMEOUT)
+            except subprocess.TimeoutExpired as exc:
+                process.kill()
+                process.communicate()
+                logger.warning("Timed out fetching metadata via yt-dlp for VK", extra={"url": url})
+                raise ProviderError("Cannot fetch metadata for VK source") from exc
+
+        if process.returncode != 0:
             logger.warning("Failed to fetch metadata via yt-dlp for VK", extra={"url": url})
-            raise ProviderError("Cannot fetch metadata for VK source") from exc
+            raise ProviderError("Cannot fetch metadata for VK source")
 
-        import json
+        return self._extract_metadata(json_codec.loads(stdout))
 
-        raw_data = json.loads(result.stdout)
-        return {
-            "title": raw_data.get("title"),
-            "uploader": raw_data.get("uploader"),
-            "duration": raw_data.get("duration"),
-        }
 
-    def _cleanup_temp_dir(self, temp_dir: Path) -> None:
-        for file_path in temp_dir.glob("*"):
-            try:
-                file_path.unlink()
-            except OSError:
-                logger.warning("Cannot remove temporary file", extra={"file": str(file_path)})
-        try:
-            temp_dir.rmdir()
-        except OSError:
-            logger.warning("Cannot remove temporary directory", extra={"dir": str(temp_dir)})
 
+def _loop_download_slots() -> asyncio.Semaphore:
+    """Семафор download_async для текущего event loop; создаётся при первой загрузке в этом цикле."""
+    loop = asyncio.get_running_loop()
+    with _async_download_slots_lock:
+        slots = _async_download_slots.get(loop)
+        if slots is None:
+            slots = _async_download_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_ASYNC_DOWNLOADS)
+        return slots
@@ -23,6 +23,7 @@ class YouTubeAdapter(BaseProviderAdapter):
     """Адаптер загрузки видео с YouTube."""
 
     name = "youtube"
+    supported_hosts = ("youtube.com", "m.youtube.com", "music.youtube.com", "youtu.be")
 
     def supports(self, url: str) -> bool:
         normalized = url.lower()
@@ -74,6 +75,7 @@ class YouTubeAdapter(BaseProviderAdapter):
         ]
         command = [
             self.executable,
+            *self.executable_args,
             *common_headers,
             *streaming_safety,
             "--format",
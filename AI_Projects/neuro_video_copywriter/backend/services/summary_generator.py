@@ -1,24 +1,127 @@
 """
 @file: summary_generator.py
 @description: Сервис генерации методички из транскрипта с использованием LLM.
-@dependencies: openai, logging, dataclasses
+@dependencies: openai (ленивый импорт), backend.services.openai_client, backend.utils.json_codec, logging, dataclasses, concurrent.futures
 @created: 2025-01-XX
 """
 
 from __future__ import annotations
 
 import dataclasses
+import functools
 import json
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
 
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None  # type: ignore
+from services.openai_client import build_http_client, create_openai_client
+from utils import json_codec
 
 logger = logging.getLogger(__name__)
 
+MAP_REDUCE_THRESHOLD_CHARS = 20_000  # длиннее — суммаризация по окнам с последующим слиянием
+MAP_WINDOW_CHARS = 12_000
+MAP_MAX_TOKENS = 800
+MAX_MAP_WORKERS = 8
+HTTP_MAX_CONNECTIONS = 32
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 16
+HTTP_READ_TIMEOUT = 120.0  # запас на медленную генерацию длинных ответов
+
+FieldCallback = Callable[[str, Any], None]
+
+_SYSTEM_PROMPTS = {
+    "ru": """Ты - эксперт по созданию методических материалов для образовательных целей.
+Твоя задача - создать структурированную методичку на основе транскрипта лекции или видео.
+
+Методичка должна быть:
+- Понятной и структурированной
+- Содержать ключевые тезисы
+- Включать важные цитаты
+- Содержать практические рекомендации
+
+Верни результат в формате JSON со следующей структурой:
+{
+  "title": "Название методички",
+  "overview": "Краткое описание содержания",
+  "key_points": ["Тезис 1", "Тезис 2", ...],
+  "quotes": [{"text": "Цитата", "timestamp": "00:05:23"}, ...],
+  "recommendations": ["Рекомендация 1", ...],
+  "tags": ["тег1", "тег2", ...]
+}""",
+    "en": """You are an expert in creating educational materials.
+Your task is to create a structured summary based on a lecture or video transcript.
+
+The summary should be:
+- Clear and structured
+- Contain key points
+- Include important quotes
+- Contain practical recommendations
+
+Return the result in JSON format with the following structure:
+{
+  "title": "Summary title",
+  "overview": "Brief description",
+  "key_points": ["Point 1", "Point 2", ...],
+  "quotes": [{"text": "Quote", "timestamp": "00:05:23"}, ...],
+  "recommendations": ["Recommendation 1", ...],
+  "tags": ["tag1", "tag2", ...]
+}""",
+}
+
+_TITLE_LINES = {
+    "ru": "\nНазвание видео: {title}\n",
+    "en": "\nVideo title: {title}\n",
+}
+
+_USER_TEMPLATES = {
+    "ru": """Создай методичку на основе следующего транскрипта:{title_part}
+
+Транскрипт:
+{transcript}
+
+Создай структурированную методичку с ключевыми тезисами, важными цитатами и практическими рекомендациями.
+Если в транскрипте есть таймкоды, используй их для цитат. Если нет - оставь timestamp пустым.""",
+    "en": """Create a summary based on the following transcript:{title_part}
+
+Transcript:
+{transcript}
+
+Create a structured summary with key points, important quotes, and practical recommendations.
+If the transcript has timestamps, use them for quotes. If not - leave timestamp empty.""",
+}
+
+_PARTIAL_TEMPLATES = {
+    "ru": """Это фрагмент {index} из {total} транскрипта длинной лекции.{title_part}
+
+Фрагмент транскрипта:
+{window}
+
+Выдели ключевые тезисы, важные цитаты и рекомендации только из этого фрагмента, кратко.
+Если в транскрипте есть таймкоды, используй их для цитат. Если нет - оставь timestamp пустым.""",
+    "en": """This is part {index} of {total} of a long lecture transcript.{title_part}
+
+Transcript part:
+{window}
+
+Briefly extract key points, important quotes, and recommendations from this part only.
+If the transcript has timestamps, use them for quotes. If not - leave timestamp empty.""",
+}
+
+_REDUCE_TEMPLATES = {
+    "ru": """Ниже — частичные методички по последовательным фрагментам одной лекции в формате JSON.{title_part}
+
+Частичные методички:
+{partials}
+
+Объедини их в одну структурированную методичку: убери повторы, сохрани важные цитаты с таймкодами и практические рекомендации.""",
+    "en": """Below are partial summaries of consecutive parts of one lecture in JSON format.{title_part}
+
+Partial summaries:
+{partials}
+
+Merge them into one structured summary: remove duplicates, keep important quotes with timestamps and practical recommendations.""",
+}
+
 
 @dataclasses.dataclass(slots=True)
 class SummaryOptions:
@@ -72,21 +175,47 @@ class SummaryGenerator:
             api_key: API ключ OpenAI
             base_url: Базовый URL API (опционально)
         """
-        if OpenAI is None:
-            raise SummaryGenerationError(
-                "OpenAI library is not installed. Install it with: pip install openai"
-            )
-
         if not api_key:
             raise SummaryGenerationError("OpenAI API key is required")
 
-        self._client = OpenAI(api_key=api_key, base_url=base_url)
+        self._api_key = api_key
+        self._base_url = base_url
+        self._http_client = None
+
+    def __enter__(self) -> SummaryGenerator:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        self.close()
+
+    @functools.cached_property
+    def _client(self):
+        """Клиент OpenAI с собственным keep-alive пулом; создаётся при первом запросе."""
+        try:
+            self._http_client = build_http_client(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                read_timeout=HTTP_READ_TIMEOUT,
+            )
+            return create_openai_client(self._api_key, self._base_url, http_client=self._http_client)
+        except ImportError as exc:
+            raise SummaryGenerationError(
+                "OpenAI library is not installed. Install it with: pip install openai"
+            ) from exc
+
+    def close(self) -> None:
+        """Закрывает пул соединений; следующий запрос создаст клиент заново."""
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+        self.__dict__.pop("_client", None)
 
     def generate(
         self,
         transcript_text: str,
         video_title: Optional[str] = None,
         options: Optional[SummaryOptions] = None,
+        on_field: Optional[FieldCallback] = None,
     ) -> SummaryResult:
         """
         Генерирует методичку из транскрипта.
@@ -95,6 +224,8 @@ class SummaryGenerator:
             transcript_text: Текст транскрипции
             video_title: Название видео (опционально)
             options: Опции генерации
+            on_field: Вызывается для каждого поля верхнего уровня (title, overview, ...)
+                сразу, как только модель допишет его значение
 
         Returns:
             SummaryResult со структурой методички
@@ -106,6 +237,7 @@ class SummaryGenerator:
             raise SummaryGenerationError("Transcript text is empty")
 
         options = options or SummaryOptions()
+        self._client  # создаём клиент до запуска потоков map-этапа
 
         logger.info(
             "Generating summary",
@@ -117,33 +249,11 @@ class SummaryGenerator:
         )
 
         try:
-            prompt = self._build_prompt(transcript_text, video_title, options.language)
-            response = self._client.chat.completions.create(
-                model=options.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt(options.language),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=options.temperature,
-                max_tokens=options.max_tokens,
-                response_format={"type": "json_object"},
-            )
-
-            content = response.choices[0].message.content
-            if not content:
-                raise SummaryGenerationError("Empty response from LLM")
-
-            logger.debug("LLM response received", extra={"response_length": len(content)})
-
-            # Парсим JSON ответ
-            try:
-                summary_data = json.loads(content)
-            except json.JSONDecodeError as exc:
-                logger.error("Failed to parse LLM response as JSON", extra={"error": str(exc)})
-                raise SummaryGenerationError(f"Invalid JSON response: {exc}") from exc
+            if len(transcript_text) > MAP_REDUCE_THRESHOLD_CHARS:
+                summary_data, content = self._generate_map_reduce(transcript_text, video_title, options, on_field)
+            else:
+                prompt = self._build_prompt(transcript_text, video_title, options.language)
+                summary_data, content = self._complete_json(prompt, options, options.max_tokens, on_field)
 
             structure = self._parse_summary_structure(summary_data)
             logger.info("Summary generated successfully", extra={"title": structure.title})
@@ -162,67 +272,142 @@ class SummaryGenerator:
             )
             raise SummaryGenerationError(f"Generation failed: {exc}") from exc
 
-    def _get_system_prompt(self, language: str) -> str:
-        """Возвращает системный промпт для LLM."""
-        if language == "ru":
-            return """Ты - эксперт по созданию методических материалов для образовательных целей.
-Твоя задача - создать структурированную методичку на основе транскрипта лекции или видео.
+    def _complete_json(
+        self,
+        prompt: str,
+        options: SummaryOptions,
+        max_tokens: int,
+        on_field: Optional[FieldCallback] = None,
+    ) -> tuple[dict, str]:
+        """
+        Выполняет запрос к LLM в режиме JSON и возвращает (разобранный JSON, исходный текст).
 
-Методичка должна быть:
-- Понятной и структурированной
-- Содержать ключевые тезисы
-- Включать важные цитаты
-- Содержать практические рекомендации
+        Ответ читается потоком: готовые поля верхнего уровня передаются в ``on_field``
+        до завершения генерации, итоговый JSON разбирается целиком.
+        """
+        stream = self._client.chat.completions.create(
+            model=options.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": self._get_system_prompt(options.language),
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=options.temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            stream=True,
+        )
 
-Верни результат в формате JSON со следующей структурой:
-{
-  "title": "Название методички",
-  "overview": "Краткое описание содержания",
-  "key_points": ["Тезис 1", "Тезис 2", ...],
-  "quotes": [{"text": "Цитата", "timestamp": "00:05:23"}, ...],
-  "recommendations": ["Рекомендация 1", ...],
-  "tags": ["тег1", "тег2", ...]
-}"""
-        else:
-            return """You are an expert in creating educational materials.
-Your task is to create a structured summary based on a lecture or video transcript.
+        parts: list[str] = []
+        fields = _JsonFieldStream(on_field) if on_field is not None else None
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            piece = chunk.choices[0].delta.content
+            if piece:
+                parts.append(piece)
+                if fields is not None:
+                    fields.feed(piece)
 
-The summary should be:
-- Clear and structured
-- Contain key points
-- Include important quotes
-- Contain practical recommendations
+        content = "".join(parts)
+        if not content:
+            raise SummaryGenerationError("Empty response from LLM")
 
-Return the result in JSON format with the following structure:
-{
-  "title": "Summary title",
-  "overview": "Brief description",
-  "key_points": ["Point 1", "Point 2", ...],
-  "quotes": [{"text": "Quote", "timestamp": "00:05:23"}, ...],
-  "recommendations": ["Recommendation 1", ...],
-  "tags": ["tag1", "tag2", ...]
-}"""
+        logger.debug("LLM response received", extra={"response_length": len(content)})
 
-    def _build_prompt(self, transcript_text: str, video_title: Optional[str], language: str) -> str:
-        """Строит промпт для генерации методички."""
-        if language == "ru":
-            title_part = f"\nНазвание видео: {video_title}\n" if video_title else ""
-            return f"""Создай методичку на основе следующего транскрипта:{title_part}
+        # Парсим JSON ответ
+        try:
+            return json_codec.loads(content), content
+        except json.JSONDecodeError as exc:
+            logger.error("Failed to parse LLM response as JSON", extra={"error": str(exc)})
+            raise SummaryGenerationError(f"Invalid JSON response: {exc}") from exc
 
-Транскрипт:
-{transcript_text}
+    def _generate_map_reduce(
+        self,
+        transcript_text: str,
+        video_title: Optional[str],
+        options: SummaryOptions,
+        on_field: Optional[FieldCallback] = None,
+    ) -> tuple[dict, str]:
+        """
+        Суммаризация длинного транскрипта: частичные методички по окнам (параллельно),
+        затем один запрос, сводящий их в итоговую.
+        """
+        windows = self._split_windows(transcript_text, MAP_WINDOW_CHARS)
+        logger.info(
+            "Using map-reduce summarization",
+            extra={"transcript_length": len(transcript_text), "windows": len(windows)},
+        )
 
-Создай структурированную методичку с ключевыми тезисами, важными цитатами и практическими рекомендациями.
-Если в транскрипте есть таймкоды, используй их для цитат. Если нет - оставь timestamp пустым."""
-        else:
-            title_part = f"\nVideo title: {video_title}\n" if video_title else ""
-            return f"""Create a summary based on the following transcript:{title_part}
+        def summarize_window(index: int) -> dict:
+            prompt = self._build_partial_prompt(windows[index], index + 1, len(windows), video_title, options.language)
+            partial, _ = self._complete_json(prompt, options, MAP_MAX_TOKENS)
+            return partial
+
+        workers = min(MAX_MAP_WORKERS, len(windows))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nvc-summary-map") as executor:
+            partials = list(executor.map(summarize_window, range(len(windows))))
+
+        reduce_prompt = self._build_reduce_prompt(partials, video_title, options.language)
+        return self._complete_json(reduce_prompt, options, options.max_tokens, on_field)
+
+    @staticmethod
+    def _split_windows(text: str, window_chars: int) -> list[str]:
+        """Делит текст на окна не длиннее window_chars, предпочитая границы абзацев, строк и предложений."""
+        windows = []
+        start = 0
+        while start < len(text):
+            end = min(start + window_chars, len(text))
+            if end < len(text):
+                for separator in ("\n\n", "\n", ". "):
+                    cut = text.rfind(separator, start + window_chars // 2, end)
+                    if cut != -1:
+                        end = cut + len(separator)
+                        break
+            window = text[start:end].strip()
+            if window:
+                windows.append(window)
+            start = end
+        return windows
 
-Transcript:
-{transcript_text}
+    def _get_system_prompt(self, language: str) -> str:
+        """Возвращает системный промпт для LLM."""
+        return _SYSTEM_PROMPTS[_prompt_language(language)]
 
-Create a structured summary with key points, important quotes, and practical recommendations.
-If the transcript has timestamps, use them for quotes. If not - leave timestamp empty."""
+    def _build_prompt(self, transcript_text: str, video_title: Optional[str], language: str) -> str:
+        """Строит промпт для генерации методички."""
+        language = _prompt_language(language)
+        return _USER_TEMPLATES[language].format(
+            title_part=_title_part(video_title, language),
+            transcript=transcript_text,
+        )
+
+    def _build_partial_prompt(
+        self,
+        window_text: str,
+        index: int,
+        total: int,
+        video_title: Optional[str],
+        language: str,
+    ) -> str:
+        """Строит промпт для частичной методички по одному окну транскрипта."""
+        language = _prompt_language(language)
+        return _PARTIAL_TEMPLATES[language].format(
+            index=index,
+            total=total,
+            title_part=_title_part(video_title, language),
+            window=window_text,
+        )
+
+    def _build_reduce_prompt(self, partials: list[dict], video_title: Optional[str], language: str) -> str:
+        """Строит промпт для слияния частичных методичек в итоговую."""
+        language = _prompt_language(language)
+        return _REDUCE_TEMPLATES[language].format(
+            title_part=_title_part(video_title, language),
+            partials=json.dumps(partials, ensure_ascii=False),
+        )
 
     def _parse_summary_structure(self, data: dict) -> SummaryStructure:
         """Парсит JSON данные в структуру SummaryStructure."""
@@ -239,3 +424,66 @@ If the transcript has timestamps, use them for quotes. If not - leave timestamp
             logger.error("Failed to parse summary structure", extra={"error": str(exc), "data": data})
             raise SummaryGenerationError(f"Failed to parse summary structure: {exc}") from exc
 
+
+def _prompt_language(language: str) -> str:
+    """Промпты есть на ru и en; для прочих языков используется английский."""
+    return language if language in _SYSTEM_PROMPTS else "en"
+
+
+def _title_part(video_title: Optional[str], language: str) -> str:
+    return _TITLE_LINES[language].format(title=video_title) if video_title else ""
+
+
+class _JsonFieldStream:
+    """
+    Инкрементальный разбор JSON-объекта верхнего уровня по мере поступления текста.
+
+    Каждая пара ``"ключ": значение`` передаётся в callback, как только значение
+    полностью получено. Разбор повторяется только когда в новом фрагменте
+    появился символ, которым может завершиться значение.
+    """
+
+    _VALUE_TERMINATORS = frozenset('"]}')
+    _SKIP = frozenset(" \t\r\n,")
+
+    def __init__(self, callback: FieldCallback) -> None:
+        self._callback = callback
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos: Optional[int] = None  # позиция после "{" и уже разобранных пар
+
+    def feed(self, text: str) -> None:
+        self._buffer += text
+        if self._pos is None:
+            brace = self._buffer.find("{")
+            if brace == -1:
+                return
+            self._pos = brace + 1
+        elif not self._VALUE_TERMINATORS.intersection(text):
+            return
+        while self._parse_pair():
+            pass
+
+    def _parse_pair(self) -> bool:
+        buffer = self._buffer
+        pos = self._skip(self._pos)
+        if pos >= len(buffer) or buffer[pos] == "}":
+            return False
+        try:
+            key, pos = self._decoder.raw_decode(buffer, pos)
+            pos = self._skip(pos)
+            if pos >= len(buffer) or buffer[pos] != ":":
+                return False
+            value, end = self._decoder.raw_decode(buffer, self._skip(pos + 1))
+        except json.JSONDecodeError:
+            return False
+        if end >= len(buffer) and not isinstance(value, (str, list, dict)):
+            return False  # число или литерал на конце буфера может быть ещё не дописан
+        self._pos = end
+        self._callback(key, value)
+        return True
+
+    def _skip(self, pos: int) -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in self._SKIP:
+            pos += 1
+        return pos
@@ -1,22 +1,38 @@
 """
 @file: transcript_indexer.py
 @description: Сервис индексации транскриптов в векторное хранилище Qdrant.
-@dependencies: backend.services.embedding_service, backend.services.vector_store, uuid
+@dependencies: backend.services.embedding_service, backend.services.vector_store, uuid, re, bisect, hashlib, xxhash (опционально)
 @created: 2025-01-XX
 """
 
 from __future__ import annotations
 
+import bisect
+import hashlib
 import logging
+import re
 import uuid
-from typing import Optional
+from collections import deque
+from typing import Iterator, Optional
 from uuid import UUID
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None  # type: ignore
+
 from services.embedding_service import EmbeddingError, EmbeddingService
 from services.vector_store.client import VectorStoreClient
 
 logger = logging.getLogger(__name__)
 
+_SENTENCE_END_RE = re.compile(r"[.!?\n]")
+SENTENCE_LOOKBACK = 100  # насколько далеко назад от границы чанка искать конец предложения
+EMBED_BATCH_SIZE = 64
+_TWO_DIGITS = tuple(f"{value:02d}" for value in range(100))
+# Алгоритм входит в значение контрольной суммы: суммы из окружений с xxhash и без него не совпадут случайно
+CHECKSUM_ALGORITHM = "xxh3" if xxhash is not None else "blake2b"
+
 
 class IndexingError(Exception):
     """Ошибка при индексации транскрипта."""
@@ -83,35 +99,22 @@ class TranscriptIndexer:
         )
 
         try:
-            # Разбиваем транскрипт на чанки
-            chunks = self._split_into_chunks(transcript_text, segments)
-
-            # Генерируем эмбеддинги для всех чанков
-            chunk_texts = [chunk["text"] for chunk in chunks]
-            embeddings = self._embedding_service.generate_batch(chunk_texts)
-
-            # Формируем точки для Qdrant
-            points = []
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                point_id = uuid.uuid4()
-                points.append(
-                    {
-                        "id": str(point_id),
-                        "vector": embedding,
-                        "text": chunk["text"],
-                        "metadata": chunk.get("metadata", {}),
-                    }
-                )
-
-            # Сохраняем в векторное хранилище
-            self._vector_store.upsert_transcript_chunks(video_id, transcript_id, points)
+            # Чанки нарезаются лениво и сразу уходят в конвейер эмбеддингов и записи в Qdrant:
+            # весь список чанков с векторами в памяти не собирается
+            chunks_count = self._vector_store.upsert_stream(
+                video_id,
+                transcript_id,
+                map(self._build_point, self._iter_chunks(transcript_text, segments)),
+                self._embedding_service.generate_batch,
+                batch_size=EMBED_BATCH_SIZE,
+            )
 
             logger.info(
                 "Transcript indexed successfully",
                 extra={
                     "video_id": str(video_id),
                     "transcript_id": str(transcript_id),
-                    "chunks_count": len(points),
+                    "chunks_count": chunks_count,
                 },
             )
         except EmbeddingError as exc:
@@ -121,26 +124,40 @@ class TranscriptIndexer:
             logger.error("Indexing failed", extra={"error": str(exc)})
             raise IndexingError(f"Indexing failed: {exc}") from exc
 
-    def _split_into_chunks(
+    @staticmethod
+    def _build_point(chunk: dict) -> tuple[str, dict]:
+        """
+        Идентификатор и payload точки для чанка.
+
+        В payload добавляется контрольная сумма текста чанка — по ней в Qdrant можно
+        находить уже проиндексированные чанки и не векторизовать их повторно.
+        """
+        payload = {
+            "text": chunk["text"],
+            "metadata": chunk.get("metadata", {}),
+            "checksum": _chunk_checksum(chunk["text"].encode("utf-8")),
+        }
+        return str(uuid.uuid4()), payload
+
+    def _iter_chunks(
         self,
         text: str,
         segments: Optional[list[dict]] = None,
-    ) -> list[dict]:
+    ) -> Iterator[dict]:
         """
-        Разбивает текст на чанки.
+        Разбивает текст на чанки, отдавая их по одному.
 
         Args:
             text: Текст для разбиения
             segments: Сегменты с таймкодами (если есть)
 
-        Returns:
-            Список чанков с метаданными
+        Yields:
+            Чанк с метаданными
         """
         if segments:
             # Используем сегменты для более точного разбиения
-            chunks = []
-            current_chunk = []
-            current_length = 0
+            current_chunk: deque[dict] = deque()
+            current_length = 0  # суммарная длина текстов в current_chunk, ведётся инкрементально
 
             for segment in segments:
                 segment_text = segment.get("text", "").strip()
@@ -148,85 +165,74 @@ class TranscriptIndexer:
                     continue
 
                 segment_length = len(segment_text)
-                start_time = segment.get("start", 0.0)
-                end_time = segment.get("end", 0.0)
 
                 # Если текущий чанк + новый сегмент превышает размер, сохраняем чанк
                 if current_length + segment_length > self._chunk_size and current_chunk:
-                    chunk_text = " ".join(current_chunk)
-                    chunks.append(
-                        {
-                            "text": chunk_text,
-                            "metadata": {
-                                "start_time": current_chunk[0].get("start_time", 0.0),
-                                "end_time": current_chunk[-1].get("end_time", 0.0),
-                                "timestamp": self._format_timestamp(current_chunk[0].get("start_time", 0.0)),
-                            },
-                        }
-                    )
-                    # Начинаем новый чанк с перекрытием
-                    overlap_size = min(self._chunk_overlap, len(current_chunk))
-                    current_chunk = current_chunk[-overlap_size:] if overlap_size > 0 else []
-                    current_length = sum(len(c.get("text", "")) for c in current_chunk)
+                    yield self._build_segment_chunk(current_chunk)
+                    # Начинаем новый чанк с перекрытием: оставляем хвост не длиннее chunk_overlap символов
+                    while current_chunk and current_length > self._chunk_overlap:
+                        current_length -= len(current_chunk.popleft()["text"])
 
                 current_chunk.append(
                     {
                         "text": segment_text,
-                        "start_time": start_time,
-                        "end_time": end_time,
+                        "start_time": segment.get("start", 0.0),
+                        "end_time": segment.get("end", 0.0),
                     }
                 )
                 current_length += segment_length
 
             # Добавляем последний чанк
             if current_chunk:
-                chunk_text = " ".join(c["text"] for c in current_chunk)
-                chunks.append(
-                    {
-                        "text": chunk_text,
-                        "metadata": {
-                            "start_time": current_chunk[0].get("start_time", 0.0),
-                            "end_time": current_chunk[-1].get("end_time", 0.0),
-                            "timestamp": self._format_timestamp(current_chunk[0].get("start_time", 0.0)),
-                        },
-                    }
-                )
-
-            return chunks
+                yield self._build_segment_chunk(current_chunk)
         else:
             # Простое разбиение по символам
-            chunks = []
             start = 0
+            # Позиции сразу после концов предложений, в порядке возрастания
+            boundaries = [match.end() for match in _SENTENCE_END_RE.finditer(text)]
 
             while start < len(text):
                 end = min(start + self._chunk_size, len(text))
 
                 # Пытаемся разбить по предложению
                 if end < len(text):
-                    # Ищем последнюю точку, восклицательный или вопросительный знак
-                    for i in range(end, max(start, end - 100), -1):
-                        if text[i] in ".!?\n":
-                            end = i + 1
-                            break
+                    # Последний конец предложения в окне (end - SENTENCE_LOOKBACK, end]
+                    idx = bisect.bisect_right(boundaries, end + 1) - 1
+                    if idx >= 0 and boundaries[idx] > max(start, end - SENTENCE_LOOKBACK) + 1:
+                        end = boundaries[idx]
 
                 chunk_text = text[start:end].strip()
                 if chunk_text:
-                    chunks.append(
-                        {
-                            "text": chunk_text,
-                            "metadata": {},
-                        }
-                    )
+                    yield {
+                        "text": chunk_text,
+                        "metadata": {},
+                    }
 
                 # Перекрытие
                 start = max(start + 1, end - self._chunk_overlap)
 
-            return chunks
+    def _build_segment_chunk(self, segments: deque[dict]) -> dict:
+        """Собирает чанк из подряд идущих сегментов: текст склеивается один раз при сбросе."""
+        start_time = segments[0].get("start_time", 0.0)
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "metadata": {
+                "start_time": start_time,
+                "end_time": segments[-1].get("end_time", 0.0),
+                "timestamp": self._format_timestamp(start_time),
+            },
+        }
 
     def _format_timestamp(self, seconds: float) -> str:
         """Форматирует секунды в формат HH:MM:SS."""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+        minutes, secs = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        hours_text = _TWO_DIGITS[hours] if hours < 100 else str(hours)
+        return f"{hours_text}:{_TWO_DIGITS[minutes]}:{_TWO_DIGITS[secs]}"
+
 
+def _chunk_checksum(data: bytes) -> str:
+    """Контрольная сумма текста чанка вида "<алгоритм>:<hex>"; xxh3 при наличии xxhash, иначе blake2b-64."""
+    if xxhash is not None:
+        return f"{CHECKSUM_ALGORITHM}:{xxhash.xxh3_64_hexdigest(data)}"
+    return f"{CHECKSUM_ALGORITHM}:{hashlib.blake2b(data, digest_size=8).hexdigest()}"
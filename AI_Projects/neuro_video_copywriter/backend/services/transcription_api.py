@@ -1,26 +1,56 @@
 """
 @file: transcription_api.py
 @description: Сервис транскрибации аудио через OpenAI API.
-@dependencies: openai, pathlib, logging, dataclasses
+@dependencies: openai, numpy, backend.services.openai_client, backend.services.audio_fingerprint, backend.services.audio_vad, backend.utils.resilience, asyncio, threading, mmap, mimetypes, pathlib, logging, dataclasses
 @created: 2025-01-XX
 """
 
 from __future__ import annotations
 
+import asyncio
 import dataclasses
+import io
 import logging
+import mimetypes
+import mmap
+import os
+import queue
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
 
 try:
     from openai import OpenAI
 except ImportError:
     OpenAI = None  # type: ignore
 
-from .audio_chunker import AudioChunkConfig, AudioChunkError, AudioChunker
+from utils.resilience import RateLimiter, call_with_retry, call_with_retry_async
+
+from .audio_chunker import AudioChunk, AudioChunkConfig, AudioChunkError, AudioChunker
+from .audio_fingerprint import FINGERPRINT_SIZE, AudioFingerprint, FingerprintError, compute_fingerprint
+from .audio_vad import TrimmedAudio, VADError, trim_silence
+from .openai_client import build_async_http_client, create_async_openai_client, is_transient_openai_error
+from .transcription_cache import TranscriptionCache
+
+if TYPE_CHECKING:
+    from .vector_store import VectorStoreClient
 
 logger = logging.getLogger(__name__)
 
+MAX_FILE_SIZE_MB = 25  # лимит OpenAI на размер файла в одном запросе
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+# Модели, которые отдают транскрипт потоком событий transcript.text.delta (whisper-1 не умеет)
+STREAMING_MODELS = frozenset({"gpt-4o-transcribe", "gpt-4o-mini-transcribe"})
+MAX_CONCURRENT_CHUNKS = 5  # одновременных загрузок чанков в API
+ASYNC_POOL_SIZE = 20  # keep-alive соединений асинхронного клиента, переживающих отдельные вызовы
+CHUNK_READ_TIMEOUT = 120.0  # распознавание 25MB чанка занимает десятки секунд
+MAX_ATTEMPTS = 4  # задержки между попытками 1 → 2 → 4 с (+ джиттер)
+FINGERPRINT_DURATION_TOLERANCE = 0.1  # почти дубликат не может отличаться по длительности больше чем на 10%
+VAD_RESPONSE_FORMATS = frozenset({"json", "verbose_json"})  # форматы, чьи таймкоды можно пересчитать после обрезки пауз
+
 
 @dataclasses.dataclass(slots=True)
 class APITranscriptionOptions:
@@ -31,6 +61,11 @@ class APITranscriptionOptions:
     prompt: Optional[str] = None  # Подсказка для улучшения точности
     response_format: str = "json"  # json, text, srt, verbose_json, vtt
     temperature: float = 0.0
+    max_concurrent: int = MAX_CONCURRENT_CHUNKS  # одновременных запросов при транскрибации по чанкам
+    rpm_limit: Optional[int] = None  # лимит запросов в минуту для аккаунта; None — без ограничения
+    audio_seconds_per_minute: Optional[float] = None  # лимит секунд аудио в минуту; None — без ограничения
+    semantic_cache_threshold: Optional[float] = None  # близость отпечатка для повторного использования; None — выкл.
+    vad_trim: bool = False  # вырезать паузы перед отправкой (только json/verbose_json): платятся минуты аудио
 
 
 @dataclasses.dataclass(slots=True)
@@ -56,6 +91,9 @@ class APITranscriptionService:
         self,
         api_key: str,
         base_url: Optional[str] = None,
+        chunk_config: Optional[AudioChunkConfig] = None,
+        cache: Optional[TranscriptionCache] = None,
+        vector_store: Optional[VectorStoreClient] = None,
     ) -> None:
         """
         Инициализация сервиса транскрибации.
@@ -63,6 +101,9 @@ class APITranscriptionService:
         Args:
             api_key: API ключ OpenAI
             base_url: Базовый URL API (опционально, для совместимости с другими провайдерами)
+            chunk_config: Настройки разбиения больших файлов на чанки
+            cache: Кэш результатов по содержимому аудио (опционально)
+            vector_store: Хранилище отпечатков аудио для поиска почти дубликатов (опционально, вместе с cache)
         """
         if OpenAI is None:
             raise APITranscriptionError(
@@ -72,7 +113,42 @@ class APITranscriptionService:
         if not api_key:
             raise APITranscriptionError("OpenAI API key is required")
 
-        self._client = OpenAI(api_key=api_key, base_url=base_url)
+        self._api_key = api_key
+        self._base_url = base_url
+        # Повторы с backoff выполняет сервис, встроенные в SDK отключены
+        self._client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self._chunk_config = chunk_config or AudioChunkConfig()
+        self._cache = cache
+        self._vector_store = vector_store
+        # Лимитеры общие для всех вызовов с одинаковыми лимитами: квота считается на аккаунт, а не на запрос
+        self._rate_limiters: dict[tuple[Optional[int], Optional[float]], RateLimiter] = {}
+        self._rate_limiters_lock = threading.Lock()
+        # Асинхронный клиент живёт в собственном event loop фонового потока: соединения httpx
+        # привязаны к loop, и только так пул переиспользуется между вызовами transcribe()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._async_client = None
+        self._loop_lock = threading.Lock()
+
+    def __enter__(self) -> APITranscriptionService:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        self.close()
+
+    def close(self) -> None:
+        """Закрывает асинхронный пул соединений и останавливает фоновый event loop; следующий вызов создаст их заново."""
+        with self._loop_lock:
+            loop, thread, client = self._loop, self._loop_thread, self._async_client
+            self._loop = self._loop_thread = self._async_client = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown_loop(client), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
 
     def transcribe(
         self,
@@ -92,23 +168,135 @@ class APITranscriptionService:
         Raises:
             APITranscriptionError: При ошибке транскрибации
         """
-        if not audio_path.exists():
-            raise APITranscriptionError(f"Audio file not found: {audio_path}")
-
+        size_bytes = _file_size(audio_path)
         options = options or APITranscriptionOptions()
 
-        file_size_mb = audio_path.stat().st_size / (1024 * 1024)
+        cache_key = None
+        fingerprint = None
+        if self._cache is not None:
+            cache_key = self._cache.make_key(audio_path, "api", _cache_options(options))
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("API transcription served from cache", extra={"audio_path": str(audio_path)})
+                return APITranscriptionResult(**cached)
+
+            if self._vector_store is not None and options.semantic_cache_threshold is not None:
+                fingerprint = self._fingerprint(audio_path)
+                cached = self._find_near_duplicate(fingerprint, options) if fingerprint is not None else None
+                if cached is not None:
+                    logger.info(
+                        "API transcription served from near-duplicate cache",
+                        extra={"audio_path": str(audio_path)},
+                    )
+                    return APITranscriptionResult(**cached)
+
+        with tempfile.TemporaryDirectory(prefix="nvc_vad_") as temp_dir:
+            trimmed = self._trim_silence(audio_path, Path(temp_dir), options)
+            source_path = audio_path
+            if trimmed is not None:
+                source_path = trimmed.path
+                size_bytes = _file_size(source_path)
+
+            if size_bytes <= MAX_FILE_SIZE_BYTES:
+                result = self._transcribe_file(source_path, options, size_bytes)
+            else:
+                result = self._transcribe_in_chunks(source_path, options, size_bytes)
+
+        if trimmed is not None:
+            result.segments = trimmed.remap_segments(result.segments)
+
+        if cache_key is not None:
+            self._cache.set(cache_key, dataclasses.asdict(result))
+            if fingerprint is not None:
+                self._remember_fingerprint(fingerprint, cache_key, options)
+        return result
+
+    def _trim_silence(
+        self,
+        audio_path: Path,
+        temp_dir: Path,
+        options: APITranscriptionOptions,
+    ) -> Optional[TrimmedAudio]:
+        """
+        Вырезает паузы во временный файл; при ошибке ffmpeg транскрибируется исходный файл.
 
-        if file_size_mb <= 25:
-            return self._transcribe_file(audio_path, options, file_size_mb)
+        Обрезка возможна только для json/verbose_json: srt, vtt и text приходят строкой,
+        таймкоды в которой нельзя пересчитать обратно на исходный файл.
+        """
+        if not options.vad_trim or options.response_format not in VAD_RESPONSE_FORMATS:
+            return None
+        try:
+            return trim_silence(
+                audio_path,
+                temp_dir / f"{audio_path.stem}_speech.{self._chunk_config.output_format}",
+                self._chunk_config.ffmpeg_executable,
+                cache=self._cache,
+                bitrate_kbps=self._chunk_config.output_bitrate_kbps,
+            )
+        except VADError as exc:
+            logger.warning(
+                "Silence trimming skipped",
+                extra={"audio_path": str(audio_path), "error": str(exc)},
+            )
+            return None
+
+    def _fingerprint(self, audio_path: Path) -> Optional[AudioFingerprint]:
+        try:
+            return compute_fingerprint(audio_path, self._chunk_config.ffmpeg_executable)
+        except FingerprintError as exc:
+            logger.warning(
+                "Audio fingerprint unavailable",
+                extra={"audio_path": str(audio_path), "error": str(exc)},
+            )
+            return None
 
-        return self._transcribe_in_chunks(audio_path, options, file_size_mb)
+    def _find_near_duplicate(self, fingerprint: AudioFingerprint, options: APITranscriptionOptions) -> Optional[dict]:
+        """Ищет ранее транскрибированный файл с близким отпечатком и теми же опциями; сбой поиска не прерывает работу."""
+        try:
+            self._vector_store.ensure_fingerprint_collection(FINGERPRINT_SIZE)
+            hits = self._vector_store.search_fingerprint(fingerprint.vector, top_k=1)
+        except Exception as exc:
+            logger.warning("Fingerprint search failed", extra={"error": str(exc)})
+            return None
+        if not hits or hits[0]["score"] < options.semantic_cache_threshold:
+            return None
+
+        payload = hits[0]["payload"] or {}
+        if payload.get("options_digest") != TranscriptionCache.options_digest(_cache_options(options)):
+            return None
+        stored_duration = payload.get("duration_seconds") or 0.0
+        if abs(stored_duration - fingerprint.duration_seconds) > FINGERPRINT_DURATION_TOLERANCE * max(
+            stored_duration, fingerprint.duration_seconds
+        ):
+            return None
+        return self._cache.get(payload["cache_key"])
+
+    def _remember_fingerprint(
+        self,
+        fingerprint: AudioFingerprint,
+        cache_key: str,
+        options: APITranscriptionOptions,
+    ) -> None:
+        try:
+            self._vector_store.ensure_fingerprint_collection(FINGERPRINT_SIZE)
+            self._vector_store.upsert_fingerprint(
+                # Идентификатор выводится из ключа кэша: повторная запись того же файла перезаписывает точку
+                str(uuid.uuid5(uuid.NAMESPACE_URL, cache_key)),
+                fingerprint.vector,
+                {
+                    "cache_key": cache_key,
+                    "options_digest": TranscriptionCache.options_digest(_cache_options(options)),
+                    "duration_seconds": fingerprint.duration_seconds,
+                },
+            )
+        except Exception as exc:
+            logger.warning("Cannot store audio fingerprint", extra={"error": str(exc)})
 
     def _transcribe_file(
         self,
         audio_path: Path,
         options: APITranscriptionOptions,
-        file_size_mb: float,
+        size_bytes: int,
     ) -> APITranscriptionResult:
         logger.info(
             "Starting API transcription",
@@ -116,12 +304,12 @@ class APITranscriptionService:
                 "audio_path": str(audio_path),
                 "model": options.model,
                 "language": options.language,
-                "file_size_mb": f"{file_size_mb:.2f}",
+                "file_size_mb": f"{size_bytes / (1024 * 1024):.2f}",
             },
         )
 
         try:
-            transcript = self._call_openai(audio_path, options)
+            transcript = self._call_openai(audio_path, options, size_bytes)
         except Exception as exc:
             logger.error(
                 "API transcription failed",
@@ -143,7 +331,7 @@ class APITranscriptionService:
         self,
         audio_path: Path,
         options: APITranscriptionOptions,
-        file_size_mb: float,
+        size_bytes: int,
     ) -> APITranscriptionResult:
         logger.info(
             "Starting chunked API transcription",
@@ -151,34 +339,12 @@ class APITranscriptionService:
                 "audio_path": str(audio_path),
                 "model": options.model,
                 "language": options.language,
-                "file_size_mb": f"{file_size_mb:.2f}",
+                "file_size_mb": f"{size_bytes / (1024 * 1024):.2f}",
             },
         )
 
-        combined_text: list[str] = []
-        detected_language: Optional[str] = None
-        chunk_count = 0
-
         try:
-            with AudioChunker(AudioChunkConfig()) as chunker:
-                for chunk_path in chunker.chunk(audio_path):
-                    chunk_count += 1
-                    chunk_size_mb = chunk_path.stat().st_size / (1024 * 1024)
-                    logger.debug(
-                        "Sending chunk to OpenAI",
-                        extra={
-                            "audio_path": str(audio_path),
-                            "chunk_index": chunk_count,
-                            "chunk_file": str(chunk_path),
-                            "chunk_size_mb": f"{chunk_size_mb:.2f}",
-                        },
-                    )
-                    chunk_result = self._call_openai(chunk_path, options)
-                    if chunk_result.text:
-                        combined_text.append(chunk_result.text.strip())
-                    if not detected_language and chunk_result.language:
-                        detected_language = chunk_result.language
-
+            chunk_results = self._run_async(lambda client: self._transcribe_chunks_async(client, audio_path, options))
         except AudioChunkError as exc:
             logger.error(
                 "Chunking failed",
@@ -192,11 +358,14 @@ class APITranscriptionService:
             )
             raise APITranscriptionError(f"API transcription failed: {exc}") from exc
 
+        combined_text = [result.text.strip() for result in chunk_results if result.text]
+        detected_language = next((result.language for result in chunk_results if result.language), None)
+
         logger.info(
             "Chunked API transcription completed",
             extra={
                 "audio_path": str(audio_path),
-                "chunks_processed": chunk_count,
+                "chunks_processed": len(chunk_results),
                 "text_length": sum(len(part) for part in combined_text),
                 "language": detected_language or options.language or "unknown",
             },
@@ -209,21 +378,264 @@ class APITranscriptionService:
             model=options.model,
         )
 
-    def _call_openai(
+    def transcribe_stream(
         self,
         audio_path: Path,
+        options: Optional[APITranscriptionOptions] = None,
+    ) -> Iterator[str]:
+        """
+        Транскрибирует аудиофайл, отдавая текст частями по мере готовности.
+
+        Файл до MAX_FILE_SIZE_MB для моделей из STREAMING_MODELS приходит дельтами текста
+        (stream=True); большой файл — текстами чанков в исходном порядке, как только готовы
+        чанк и все предыдущие, пока остальные ещё распознаются. Для прочих моделей небольшой
+        файл отдаётся одним куском. Части не содержат разделителей между чанками.
+
+        Raises:
+            APITranscriptionError: При ошибке транскрибации
+        """
+        size_bytes = _file_size(audio_path)
+        options = options or APITranscriptionOptions()
+        if size_bytes > MAX_FILE_SIZE_BYTES:
+            yield from self._stream_chunks(audio_path, options)
+        elif options.model in STREAMING_MODELS:
+            yield from self._stream_file(audio_path, options, size_bytes)
+        else:
+            yield self.transcribe(audio_path, options).text
+
+    def _stream_file(self, audio_path: Path, options: APITranscriptionOptions, size_bytes: int) -> Iterator[str]:
+        rate_limiter = self._rate_limiter(options)
+        if rate_limiter is not None:
+            rate_limiter.acquire(self._estimate_audio_seconds(size_bytes))
+
+        try:
+            with open(audio_path, "rb") as audio_file:
+                stream = self._client.audio.transcriptions.create(
+                    model=options.model,
+                    file=audio_file,
+                    language=options.language,
+                    prompt=options.prompt,
+                    # Потоковый режим поддерживает только json и text
+                    response_format="text" if options.response_format == "text" else "json",
+                    temperature=options.temperature,
+                    stream=True,
+                )
+                for event in stream:
+                    if event.type == "transcript.text.delta" and event.delta:
+                        yield event.delta
+        except Exception as exc:
+            logger.error(
+                "Streaming API transcription failed",
+                extra={"audio_path": str(audio_path), "error": str(exc)},
+            )
+            raise APITranscriptionError(f"API transcription failed: {exc}") from exc
+
+    def _stream_chunks(self, audio_path: Path, options: APITranscriptionOptions) -> Iterator[str]:
+        finished = object()
+        results: queue.Queue = queue.Queue()
+
+        def on_result(chunk_index: int, result: APITranscriptionResult) -> None:
+            results.put((chunk_index, result.text.strip() if result.text else ""))
+
+        future = self._submit_async(
+            lambda client: self._transcribe_chunks_async(client, audio_path, options, on_result=on_result)
+        )
+        future.add_done_callback(lambda _: results.put(finished))
+
+        ready: dict[int, str] = {}
+        next_index = 1
+        try:
+            while (item := results.get()) is not finished:
+                chunk_index, text = item
+                ready[chunk_index] = text
+                while next_index in ready:
+                    text = ready.pop(next_index)
+                    next_index += 1
+                    if text:
+                        yield text
+            future.result()
+        except AudioChunkError as exc:
+            raise APITranscriptionError(f"Chunking failed: {exc}") from exc
+        except Exception as exc:
+            logger.error(
+                "Chunked API transcription failed",
+                extra={"audio_path": str(audio_path), "error": str(exc)},
+            )
+            raise APITranscriptionError(f"API transcription failed: {exc}") from exc
+        finally:
+            # Потребитель прекратил чтение раньше времени — оставшиеся запросы не нужны
+            future.cancel()
+
+    def _run_async(self, make_coroutine):
+        """Выполняет корутину в фоновом event loop сервиса, передавая ей общий AsyncOpenAI клиент."""
+        return self._submit_async(make_coroutine).result()
+
+    def _submit_async(self, make_coroutine) -> Future:
+        """Планирует корутину в фоновом event loop сервиса (создаёт его и клиент при первом вызове)."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._async_client = create_async_openai_client(
+                    self._api_key,
+                    self._base_url,
+                    http_client=build_async_http_client(ASYNC_POOL_SIZE, read_timeout=CHUNK_READ_TIMEOUT),
+                    max_retries=0,
+                )
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="nvc-transcription-loop",
+                    daemon=True,
+                )
+                self._loop_thread.start()
+            loop, client = self._loop, self._async_client
+        return asyncio.run_coroutine_threadsafe(make_coroutine(client), loop)
+
+    async def _transcribe_chunks_async(
+        self,
+        client,
+        audio_path: Path,
+        options: APITranscriptionOptions,
+        on_result: Optional[Callable[[int, APITranscriptionResult], None]] = None,
+    ) -> list[APITranscriptionResult]:
+        """
+        Отправляет чанки в API параллельно, не более options.max_concurrent запросов одновременно.
+
+        Чанки нарезаются в фоновом потоке и уходят в API по мере готовности (временные
+        файлы через mmap или буферы в памяти при chunk_config.in_memory); результаты
+        возвращаются в порядке чанков. ``on_result`` вызывается в потоке
+        event loop для каждого чанка в порядке завершения запросов.
+        """
+        semaphore = asyncio.Semaphore(max(1, options.max_concurrent))
+        rate_limiter = self._rate_limiter(options)
+
+        async def transcribe_chunk(chunk_index: int, chunk: AudioChunk) -> APITranscriptionResult:
+            if isinstance(chunk, Path):
+                filename, source = chunk.name, _map_audio(chunk)
+            else:
+                filename, source = f"chunk_{chunk_index:05d}.{self._chunk_config.output_format}", chunk
+            async with semaphore:
+                # Буфер BytesIO закрывается после отправки и освобождает память чанка
+                with source as data:
+                    size_bytes = len(data) if isinstance(data, mmap.mmap) else data.getbuffer().nbytes
+                    logger.debug(
+                        "Sending chunk to OpenAI",
+                        extra={
+                            "audio_path": str(audio_path),
+                            "chunk_index": chunk_index,
+                            "chunk_file": filename,
+                            "chunk_size_mb": f"{size_bytes / (1024 * 1024):.2f}",
+                        },
+                    )
+                    if rate_limiter is not None:
+                        await rate_limiter.acquire_async(self._estimate_audio_seconds(size_bytes))
+                    result = await self._call_openai_async(client, filename, data, options)
+            if on_result is not None:
+                on_result(chunk_index, result)
+            return result
+
+        loop = asyncio.get_running_loop()
+        failed = loop.create_future()
+
+        def stop_on_failure(task: asyncio.Task[APITranscriptionResult]) -> None:
+            if not task.cancelled() and task.exception() is not None and not failed.done():
+                failed.set_result(None)
+
+        tasks: list[asyncio.Task[APITranscriptionResult]] = []
+        with AudioChunker(self._chunk_config) as chunker:
+            chunks = chunker.prefetch_iter(audio_path)
+            pending: Optional[asyncio.Future] = None
+            try:
+                # Нарезка прекращается на первом неудачном чанке: остаток файла уже не нужен
+                while not failed.done():
+                    pending = loop.run_in_executor(None, next, chunks, None)
+                    await asyncio.wait((pending, failed), return_when=asyncio.FIRST_COMPLETED)
+                    if failed.done():
+                        break
+                    chunk = pending.result()
+                    pending = None
+                    if chunk is None:
+                        break
+                    task = asyncio.create_task(transcribe_chunk(len(tasks) + 1, chunk))
+                    task.add_done_callback(stop_on_failure)
+                    tasks.append(task)
+                return list(await asyncio.gather(*tasks))
+            finally:
+                # При ошибке остальные запросы отменяются до удаления временных файлов чанков
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                if pending is not None:
+                    # next() в потоке не прервать: закрывать генератор можно только после его возврата
+                    await asyncio.wait((pending,))
+                    pending.exception()
+                chunks.close()
+
+    async def _call_openai_async(
+        self,
+        client,
+        filename: str,
+        data: mmap.mmap | io.BytesIO,
         options: APITranscriptionOptions,
     ) -> APITranscriptionResult:
-        with open(audio_path, "rb") as audio_file:
-            transcript = self._client.audio.transcriptions.create(
+        transcript = await call_with_retry_async(
+            lambda: client.audio.transcriptions.create(
                 model=options.model,
-                file=audio_file,
+                file=(filename, data, _audio_mime_type(filename)),
                 language=options.language,
                 prompt=options.prompt,
                 response_format=options.response_format,
                 temperature=options.temperature,
-            )
+            ),
+            is_retryable=is_transient_openai_error,
+            max_attempts=MAX_ATTEMPTS,
+        )
+        return self._to_result(transcript, options)
 
+    def _call_openai(
+        self,
+        audio_path: Path,
+        options: APITranscriptionOptions,
+        size_bytes: int,
+    ) -> APITranscriptionResult:
+        rate_limiter = self._rate_limiter(options)
+        if rate_limiter is not None:
+            rate_limiter.acquire(self._estimate_audio_seconds(size_bytes))
+
+        with _map_audio(audio_path) as data:
+            transcript = call_with_retry(
+                lambda: self._client.audio.transcriptions.create(
+                    model=options.model,
+                    file=(audio_path.name, data, _audio_mime_type(audio_path.name)),
+                    language=options.language,
+                    prompt=options.prompt,
+                    response_format=options.response_format,
+                    temperature=options.temperature,
+                ),
+                is_retryable=is_transient_openai_error,
+                max_attempts=MAX_ATTEMPTS,
+            )
+        return self._to_result(transcript, options)
+
+    def _rate_limiter(self, options: APITranscriptionOptions) -> Optional[RateLimiter]:
+        if options.rpm_limit is None and options.audio_seconds_per_minute is None:
+            return None
+        key = (options.rpm_limit, options.audio_seconds_per_minute)
+        with self._rate_limiters_lock:
+            limiter = self._rate_limiters.get(key)
+            if limiter is None:
+                limiter = RateLimiter(
+                    requests_per_minute=options.rpm_limit,
+                    units_per_minute=options.audio_seconds_per_minute,
+                )
+                self._rate_limiters[key] = limiter
+            return limiter
+
+    def _estimate_audio_seconds(self, size_bytes: int) -> float:
+        """Оценка длительности по размеру: чанки кодируются с битрейтом output_bitrate_kbps."""
+        return size_bytes / (self._chunk_config.output_bitrate_kbps * 125)
+
+    @staticmethod
+    def _to_result(transcript, options: APITranscriptionOptions) -> APITranscriptionResult:
         if isinstance(transcript, str):
             text = transcript
             segments = None
@@ -244,3 +656,48 @@ class APITranscriptionService:
             model=options.model,
         )
 
+
+async def _shutdown_loop(client) -> None:
+    """Отменяет незавершённые задачи фонового loop (например, брошенного потока чанков) и закрывает клиент."""
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await client.close()
+
+
+def _file_size(audio_path: Path) -> int:
+    """Размер файла одним системным вызовом stat, он же — проверка существования."""
+    try:
+        return os.stat(audio_path).st_size
+    except FileNotFoundError as exc:
+        raise APITranscriptionError(f"Audio file not found: {audio_path}") from exc
+
+
+def _map_audio(audio_path: Path) -> mmap.mmap:
+    """
+    Отображает файл в память только для чтения.
+
+    httpx читает multipart-тело из mmap блоками (перед каждой попыткой — с начала),
+    страницы подгружаются ядром по мере отправки: N параллельных загрузок не держат
+    в памяти процесса N копий чанков.
+    """
+    with open(audio_path, "rb") as audio_file:
+        # Отображение остаётся действительным после закрытия файла
+        return mmap.mmap(audio_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _audio_mime_type(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _cache_options(options: APITranscriptionOptions) -> dict:
+    """Опции, от которых зависит текст транскрипта; лимиты и параллелизм в ключ кэша не входят."""
+    return {
+        "model": options.model,
+        "language": options.language,
+        "prompt": options.prompt,
+        "response_format": options.response_format,
+        "temperature": options.temperature,
+        "vad_trim": options.vad_trim,
+    }
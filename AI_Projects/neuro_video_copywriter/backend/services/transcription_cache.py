@@ -0,0 +1,160 @@
+"""
+@file: backend/services/transcription_cache.py
+@description: Дисковый LRU-кэш результатов транскрибации, адресуемый хэшем содержимого аудио.
+@dependencies: sqlite3, hashlib, xxhash (опционально), mmap, json, threading, pathlib
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30 * 86400
+DEFAULT_SIZE_LIMIT_BYTES = 1024**3
+CACHE_FILENAME = "transcripts.sqlite3"
+# Алгоритм входит в ключ: записи, посчитанные с xxhash и без него, не перепутаются
+HASH_ALGORITHM = "xxh3_128" if xxhash is not None else "blake2b"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_accessed_at ON transcripts (accessed_at);
+"""
+
+
+class TranscriptionCache:
+    """
+    Кэш транскриптов в SQLite: ключ — хэш содержимого аудиофайла и значимых опций.
+
+    Повторная обработка того же аудио (перезапуск, повтор после ошибки) возвращает
+    сохранённый результат без обращения к модели. Записи старше ``ttl_seconds``
+    не отдаются; при превышении ``size_limit_bytes`` вытесняются давно не читанные.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        size_limit_bytes: int = DEFAULT_SIZE_LIMIT_BYTES,
+    ) -> None:
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        if size_limit_bytes <= 0:
+            raise ValueError("size_limit_bytes must be positive")
+        directory.mkdir(parents=True, exist_ok=True)
+        self._ttl_seconds = ttl_seconds
+        self._size_limit_bytes = size_limit_bytes
+        self._lock = threading.Lock()
+        # Одно соединение на кэш; сервисы вызываются из потоков пула, доступ сериализуется блокировкой
+        self._connection = sqlite3.connect(directory / CACHE_FILENAME, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def make_key(audio_path: Path, namespace: str, options: Mapping[str, Any]) -> str:
+        """Ключ записи: хэш содержимого файла, тип сервиса и опции, влияющие на результат."""
+        content_hash = TranscriptionCache.content_hash(audio_path)
+        return f"{namespace}:{HASH_ALGORITHM}:{content_hash}:{TranscriptionCache.options_digest(options)}"
+
+    @staticmethod
+    def content_hash(audio_path: Path) -> str:
+        """
+        Хэш содержимого файла; файл целиком в память не грузится.
+
+        С xxhash — xxh3-128 по отображению файла в память: один вызов SIMD-хэша
+        без копирования в буферы Python, на порядок быстрее blake2b. Иначе —
+        blake2b через hashlib.file_digest, который читает файл блоками.
+        """
+        with open(audio_path, "rb") as audio_file:
+            if xxhash is None:
+                return hashlib.file_digest(audio_file, HASH_ALGORITHM).hexdigest()
+            if audio_path.stat().st_size == 0:
+                return xxhash.xxh3_128_hexdigest(b"")
+            with mmap.mmap(audio_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return xxhash.xxh3_128_hexdigest(mapped)
+
+    @staticmethod
+    def options_digest(options: Mapping[str, Any]) -> str:
+        """Хэш опций транскрибации — часть ключа, по которой сравниваются записи разных файлов."""
+        return hashlib.sha256(
+            json.dumps(dict(options), sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Возвращает сохранённый результат (словарь полей) или None."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM transcripts WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self._ttl_seconds:
+                self._connection.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE transcripts SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: Mapping[str, Any]) -> None:
+        """Сохраняет результат; объекты SDK с model_dump() сериализуются как словари."""
+        try:
+            data = json.dumps(dict(value), ensure_ascii=False, default=_to_jsonable).encode("utf-8")
+        except TypeError as exc:
+            logger.warning("Transcription result is not cacheable", extra={"key": key, "error": str(exc)})
+            return
+
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO transcripts (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Удаляет просроченные записи, затем давно не читанные — пока суммарный размер выше лимита."""
+        self._connection.execute("DELETE FROM transcripts WHERE created_at < ?", (now - self._ttl_seconds,))
+        (total,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()
+        if total <= self._size_limit_bytes:
+            return
+        excess = total - self._size_limit_bytes
+        freed = 0
+        stale_keys: list[str] = []
+        for key, size in self._connection.execute("SELECT key, size FROM transcripts ORDER BY accessed_at"):
+            stale_keys.append(key)
+            freed += size
+            if freed >= excess:
+                break
+        self._connection.executemany("DELETE FROM transcripts WHERE key = ?", ((key,) for key in stale_keys))
+
+
+def _to_jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
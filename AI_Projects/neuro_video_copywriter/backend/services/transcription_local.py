@@ -1,7 +1,7 @@
 """
 @file: transcription_local.py
-@description: Сервис локальной транскрибации аудио с использованием OpenAI Whisper.
-@dependencies: whisper, pathlib, logging, dataclasses
+@description: Сервис локальной транскрибации аудио: faster-whisper (CTranslate2) или OpenAI Whisper.
+@dependencies: faster_whisper, whisper, torch, backend.services.audio_vad, backend.services.transcription_cache, pathlib, tempfile, threading, collections, logging, dataclasses
 @created: 2025-01-XX
 """
 
@@ -9,16 +9,50 @@ from __future__ import annotations
 
 import dataclasses
 import logging
+import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 try:
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+except ImportError:
+    BatchedInferencePipeline = None  # type: ignore
+    WhisperModel = None  # type: ignore
+
+try:
+    import torch
     import whisper
 except ImportError:
+    torch = None  # type: ignore
     whisper = None  # type: ignore
 
+from .audio_vad import TrimmedAudio, VADError, trim_silence
+from .transcription_cache import TranscriptionCache
+
 logger = logging.getLogger(__name__)
 
+BEAM_SIZE = 5
+BATCH_SIZE = 16  # сегментов аудио на один проход декодера (batched-пайплайн, transcribe_batch)
+MODEL_REGISTRY_SIZE = 2  # сколько моделей держать в памяти одновременно (large-v3 занимает ~3 ГБ)
+SEGMENT_FIELDS = (
+    "id",
+    "seek",
+    "start",
+    "end",
+    "text",
+    "tokens",
+    "temperature",
+    "avg_logprob",
+    "compression_ratio",
+    "no_speech_prob",
+)
+
+# Модели общие для всех экземпляров сервиса в процессе: ключ — (название модели, устройство)
+_MODEL_REGISTRY: OrderedDict[tuple[str, Optional[str]], Any] = OrderedDict()
+_MODEL_REGISTRY_LOCK = threading.Lock()
+
 
 @dataclasses.dataclass(slots=True)
 class TranscriptionOptions:
@@ -29,6 +63,7 @@ class TranscriptionOptions:
     task: str = "transcribe"  # transcribe или translate
     temperature: float = 0.0
     verbose: bool = False
+    vad_trim: bool = False  # вырезать паузы перед распознаванием (faster-whisper делает это сам через vad_filter)
 
 
 @dataclasses.dataclass(slots=True)
@@ -48,12 +83,19 @@ class TranscriptionError(Exception):
 
 
 class LocalTranscriptionService:
-    """Сервис локальной транскрибации через Whisper."""
+    """
+    Сервис локальной транскрибации через Whisper.
+
+    Если установлен faster-whisper, используется он: квантованная модель CTranslate2
+    (INT8 на CPU, INT8/FP16 на GPU) и пакетное декодирование сегментов с VAD-фильтром.
+    Иначе — эталонная реализация openai-whisper.
+    """
 
     def __init__(
         self,
         model_name: str = "base",
         device: Optional[str] = None,
+        cache: Optional[TranscriptionCache] = None,
     ) -> None:
         """
         Инициализация сервиса транскрибации.
@@ -61,15 +103,16 @@ class LocalTranscriptionService:
         Args:
             model_name: Название модели Whisper (tiny, base, small, medium, large)
             device: Устройство для выполнения (cuda, cpu, или None для автоопределения)
+            cache: Кэш результатов по содержимому аудио (опционально)
         """
-        if whisper is None:
+        if WhisperModel is None and whisper is None:
             raise TranscriptionError(
-                "OpenAI Whisper is not installed. Install it with: pip install openai-whisper"
+                "Whisper is not installed. Install it with: pip install faster-whisper (or openai-whisper)"
             )
 
         self._model_name = model_name
         self._device = device
-        self._model: Optional[whisper.Whisper] = None
+        self._cache = cache
 
     def transcribe(
         self,
@@ -94,6 +137,13 @@ class LocalTranscriptionService:
 
         options = options or TranscriptionOptions()
 
+        cache_key = self._cache_key(audio_path, options)
+        if cache_key is not None:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("Local transcription served from cache", extra={"audio_path": str(audio_path)})
+                return TranscriptionResult(**cached)
+
         logger.info(
             "Starting local transcription",
             extra={
@@ -105,13 +155,20 @@ class LocalTranscriptionService:
 
         try:
             model = self._get_model(options.model)
-            result = model.transcribe(
-                str(audio_path),
-                language=options.language,
-                task=options.task,
-                temperature=options.temperature,
-                verbose=options.verbose,
-            )
+            if WhisperModel is not None:
+                result = self._transcribe_faster(model, audio_path, options)
+            else:
+                with tempfile.TemporaryDirectory(prefix="nvc_vad_") as temp_dir:
+                    trimmed = self._trim_silence(audio_path, Path(temp_dir), options)
+                    result = model.transcribe(
+                        str(trimmed.path if trimmed is not None else audio_path),
+                        language=options.language,
+                        task=options.task,
+                        temperature=options.temperature,
+                        verbose=options.verbose,
+                    )
+                if trimmed is not None:
+                    result["segments"] = trimmed.remap_segments(result.get("segments", []))
 
             logger.info(
                 "Transcription completed",
@@ -122,7 +179,7 @@ class LocalTranscriptionService:
                 },
             )
 
-            return TranscriptionResult(
+            transcription = TranscriptionResult(
                 text=result.get("text", ""),
                 language=result.get("language", "unknown"),
                 segments=result.get("segments", []),
@@ -135,20 +192,193 @@ class LocalTranscriptionService:
             )
             raise TranscriptionError(f"Transcription failed: {exc}") from exc
 
-    def _get_model(self, model_name: str) -> whisper.Whisper:
+        if cache_key is not None:
+            self._cache.set(cache_key, dataclasses.asdict(transcription))
+        return transcription
+
+    def transcribe_batch(
+        self,
+        audio_paths: list[Path],
+        options: Optional[TranscriptionOptions] = None,
+    ) -> list[TranscriptionResult]:
+        """
+        Транскрибирует несколько файлов; результаты в порядке ``audio_paths``.
+
+        С openai-whisper файлы короче одного окна модели (30 с) декодируются пачками
+        по BATCH_SIZE за один проход: файлы сортируются по длительности, чтобы в пачке
+        оказались записи близкой длины и декодер не простаивал на коротких. Длинные файлы
+        и faster-whisper (он сам пакетирует сегменты внутри файла) идут через transcribe().
+
+        Raises:
+            TranscriptionError: При ошибке транскрибации
+        """
+        options = options or TranscriptionOptions()
+        for audio_path in audio_paths:
+            if not audio_path.exists():
+                raise TranscriptionError(f"Audio file not found: {audio_path}")
+
+        results: list[Optional[TranscriptionResult]] = [None] * len(audio_paths)
+        short_clips: list[tuple[int, Any, Optional[str]]] = []
+        for index, audio_path in enumerate(audio_paths):
+            cache_key = self._cache_key(audio_path, options)
+            cached = self._cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                results[index] = TranscriptionResult(**cached)
+                continue
+            if WhisperModel is None:
+                try:
+                    audio = whisper.load_audio(str(audio_path))
+                except Exception as exc:
+                    raise TranscriptionError(f"Cannot load audio {audio_path}: {exc}") from exc
+                if audio.shape[0] <= whisper.audio.N_SAMPLES:
+                    short_clips.append((index, audio, cache_key))
+                    continue
+            results[index] = self.transcribe(audio_path, options)
+
+        if short_clips:
+            logger.info(
+                "Starting batched local transcription",
+                extra={"files": len(short_clips), "model": options.model, "batch_size": BATCH_SIZE},
+            )
+            short_clips.sort(key=lambda clip: clip[1].shape[0])
+            for batch_start in range(0, len(short_clips), BATCH_SIZE):
+                batch = short_clips[batch_start : batch_start + BATCH_SIZE]
+                try:
+                    transcriptions = self._decode_short_batch([audio for _, audio, _ in batch], options)
+                except Exception as exc:
+                    logger.error("Batched transcription failed", extra={"error": str(exc)})
+                    raise TranscriptionError(f"Transcription failed: {exc}") from exc
+                for (index, _, cache_key), transcription in zip(batch, transcriptions):
+                    results[index] = transcription
+                    if cache_key is not None:
+                        self._cache.set(cache_key, dataclasses.asdict(transcription))
+
+        return results  # type: ignore[return-value]
+
+    def _decode_short_batch(self, clips: list[Any], options: TranscriptionOptions) -> list[TranscriptionResult]:
+        """Один проход кодировщика и декодера openai-whisper для пачки записей короче 30 с."""
+        model = self._get_model(options.model)
+        mel = torch.stack(
+            [whisper.log_mel_spectrogram(whisper.pad_or_trim(clip), model.dims.n_mels) for clip in clips]
+        ).to(model.device)
+        decoded = whisper.decode(
+            model,
+            mel,
+            whisper.DecodingOptions(
+                task=options.task,
+                language=options.language,
+                temperature=options.temperature,
+                fp16=model.device.type == "cuda",
+            ),
+        )
+
+        transcriptions = []
+        for clip, result in zip(clips, decoded):
+            segment = {field: getattr(result, field, None) for field in SEGMENT_FIELDS}
+            segment.update(id=0, seek=0, start=0.0, end=clip.shape[0] / whisper.audio.SAMPLE_RATE)
+            transcriptions.append(
+                TranscriptionResult(
+                    text=result.text,
+                    language=result.language or options.language or "unknown",
+                    segments=[segment],
+                    model=options.model,
+                )
+            )
+        return transcriptions
+
+    def _cache_key(self, audio_path: Path, options: TranscriptionOptions) -> Optional[str]:
+        if self._cache is None:
+            return None
+        return self._cache.make_key(
+            audio_path,
+            "local",
+            {
+                "engine": "faster-whisper" if WhisperModel is not None else "openai-whisper",
+                "model": options.model,
+                "language": options.language,
+                "task": options.task,
+                "temperature": options.temperature,
+                "vad_trim": options.vad_trim,
+            },
+        )
+
+    def _trim_silence(self, audio_path: Path, temp_dir: Path, options: TranscriptionOptions) -> Optional[TrimmedAudio]:
+        """Вырезает паузы во временный WAV; при ошибке ffmpeg распознаётся исходный файл."""
+        if not options.vad_trim:
+            return None
+        try:
+            return trim_silence(audio_path, temp_dir / f"{audio_path.stem}_speech.wav", cache=self._cache)
+        except VADError as exc:
+            logger.warning(
+                "Silence trimming skipped",
+                extra={"audio_path": str(audio_path), "error": str(exc)},
+            )
+            return None
+
+    @staticmethod
+    def _transcribe_faster(model: Any, audio_path: Path, options: TranscriptionOptions) -> dict:
         """
-        Получает загруженную модель Whisper (с кэшированием).
+        Транскрибирует через faster-whisper и приводит результат к формату openai-whisper.
+
+        Сегменты возвращаются ленивым генератором — декодирование идёт при его обходе,
+        поэтому список материализуется здесь, внутри обработки ошибок.
+        """
+        segments, info = model.transcribe(
+            str(audio_path),
+            language=options.language,
+            task=options.task,
+            temperature=options.temperature,
+            beam_size=BEAM_SIZE,
+            vad_filter=True,
+            batch_size=BATCH_SIZE,
+        )
+        segment_dicts = [{field: getattr(segment, field) for field in SEGMENT_FIELDS} for segment in segments]
+        if options.verbose:
+            for segment in segment_dicts:
+                logger.debug(
+                    "Segment transcribed",
+                    extra={"start": segment["start"], "end": segment["end"], "text": segment["text"]},
+                )
+        return {
+            "text": "".join(segment["text"] for segment in segment_dicts),
+            "language": info.language,
+            "segments": segment_dicts,
+        }
+
+    def _get_model(self, model_name: str) -> Any:
+        """
+        Получает загруженную модель Whisper из общего для процесса реестра.
+
+        Экземпляры сервиса с тем же устройством используют одну копию модели;
+        при превышении MODEL_REGISTRY_SIZE выгружается давно не использованная.
 
         Args:
             model_name: Название модели
 
         Returns:
-            Загруженная модель Whisper
+            Batched-пайплайн faster-whisper или модель openai-whisper
         """
-        if self._model is None or self._model_name != model_name:
-            logger.info("Loading Whisper model", extra={"model": model_name})
-            self._model = whisper.load_model(model_name, device=self._device)
-            self._model_name = model_name
-
-        return self._model
+        key = (model_name, self._device)
+        # Загрузка под блокировкой: параллельные запросы не должны грузить одну модель дважды
+        with _MODEL_REGISTRY_LOCK:
+            model = _MODEL_REGISTRY.get(key)
+            if model is not None:
+                _MODEL_REGISTRY.move_to_end(key)
+                return model
+
+            logger.info("Loading Whisper model", extra={"model": model_name, "device": self._device or "auto"})
+            model = _load_model(model_name, self._device)
+            _MODEL_REGISTRY[key] = model
+            while len(_MODEL_REGISTRY) > MODEL_REGISTRY_SIZE:
+                evicted_key, _ = _MODEL_REGISTRY.popitem(last=False)
+                logger.info("Unloading Whisper model", extra={"model": evicted_key[0]})
+            return model
+
+
+def _load_model(model_name: str, device: Optional[str]) -> Any:
+    if WhisperModel is not None:
+        device = device or "auto"
+        compute_type = "int8_float16" if device == "cuda" else "int8"
+        return BatchedInferencePipeline(model=WhisperModel(model_name, device=device, compute_type=compute_type))
+    return whisper.load_model(model_name, device=device)
 
@@ -5,7 +5,7 @@
 @created: 2025-11-12
 """
 
-from .client import VectorStoreClient, COLLECTION_NAME
+from .client import VectorStoreClient, COLLECTION_NAME, FINGERPRINT_COLLECTION_NAME
 
-__all__ = ["VectorStoreClient", "COLLECTION_NAME"]
+__all__ = ["VectorStoreClient", "COLLECTION_NAME", "FINGERPRINT_COLLECTION_NAME"]
 
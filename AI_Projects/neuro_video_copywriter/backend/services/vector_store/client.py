@@ -1,22 +1,52 @@
 """
 @file: backend/services/vector_store/client.py
 @description: Клиент для взаимодействия с Qdrant (векторное хранилище).
-@dependencies: qdrant-client, backend.config
+@dependencies: qdrant-client, numpy, backend.config, functools, itertools, concurrent.futures, threading, logging
 @created: 2025-11-12
 """
 
 from __future__ import annotations
 
-from typing import Iterable
+import functools
+import itertools
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Sequence
 from uuid import UUID
 
+import numpy as np
+
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qdrant_models
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 from config import Settings, get_settings
 
+logger = logging.getLogger(__name__)
+
 COLLECTION_NAME = "transcript_chunks"
+FINGERPRINT_COLLECTION_NAME = "audio_fingerprints_v2"  # v2: спектрально-временные отпечатки, со старыми несравнимы
+# Векторы нормируются EmbeddingService к единичной длине: Dot эквивалентен косинусу без нормировки при поиске
+VECTOR_DISTANCE = qdrant_models.Distance.DOT
+UPSERT_BATCH_SIZE = 256  # ограничивает размер одного HTTP-запроса к Qdrant
+STREAM_BATCH_SIZE = 64  # точек на один вызов эмбеддингов и одну запись в upsert_stream
+STREAM_EMBED_IN_FLIGHT = 2  # батчей, векторизуемых одновременно
+STREAM_UPSERT_CONCURRENCY = 4  # батчей, записываемых в Qdrant одновременно
+# int8-копии векторов в RAM (в 4 раза меньше float32); исходные float32 — на диске, только для пересчёта top-k
+QUANTIZATION_CONFIG = qdrant_models.ScalarQuantization(
+    scalar=qdrant_models.ScalarQuantizationConfig(
+        type=qdrant_models.ScalarType.INT8,
+        quantile=0.99,
+        always_ram=True,
+    )
+)
+HNSW_CONFIG = qdrant_models.HnswConfigDiff(m=16, ef_construct=128)
+# Кандидаты ищутся по int8 с запасом x2, затем переранжируются по исходным векторам
+SEARCH_PARAMS = qdrant_models.SearchParams(
+    quantization=qdrant_models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
 
 
 class VectorStoreClient:
@@ -24,42 +54,194 @@ class VectorStoreClient:
 
     def __init__(self, settings: Settings | None = None) -> None:
         self._settings = settings or get_settings()
-        self._client = QdrantClient(
-            url=self._settings.qdrant_url,
-            api_key=self._settings.qdrant_api_key,
+        self._client = _get_qdrant(
+            self._settings.qdrant_url,
+            self._settings.qdrant_api_key,
+            self._settings.qdrant_prefer_grpc,
+            self._settings.qdrant_grpc_port,
         )
+        # Коллекции, уже проверенные или созданные этим клиентом: (имя, размер вектора)
+        self._ensured: set[tuple[str, int]] = set()
+        self._ensure_lock = threading.Lock()
 
     def ensure_collection(self, vector_size: int) -> None:
-        try:
-            exists = self._client.collection_exists(COLLECTION_NAME)
-        except UnexpectedResponse as exc:
-            if exc.status_code != 404:
-                raise
-            exists = False
-        if exists:
+        """Создаёт коллекцию чанков, если её нет; запрос к Qdrant выполняется один раз на клиент."""
+        key = (COLLECTION_NAME, vector_size)
+        if key in self._ensured:
             return
-        self._client.recreate_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=qdrant_models.VectorParams(size=vector_size, distance=qdrant_models.Distance.COSINE),
-        )
+        with self._ensure_lock:
+            if key in self._ensured:
+                return
+            try:
+                exists = self._client.collection_exists(COLLECTION_NAME)
+            except UnexpectedResponse as exc:
+                if exc.status_code != 404:
+                    raise
+                exists = False
+            if exists:
+                self._check_vector_size(COLLECTION_NAME, vector_size)
+            else:
+                self._client.recreate_collection(
+                    collection_name=COLLECTION_NAME,
+                    vectors_config=qdrant_models.VectorParams(
+                        size=vector_size,
+                        distance=VECTOR_DISTANCE,
+                        on_disk=True,
+                    ),
+                    hnsw_config=HNSW_CONFIG,
+                    quantization_config=QUANTIZATION_CONFIG,
+                )
+            self._ensured.add(key)
+
+    def _check_vector_size(self, collection_name: str, vector_size: int) -> None:
+        """Предупреждает, если существующая коллекция создана под векторы другой размерности."""
+        vectors_config = self._client.get_collection(collection_name).config.params.vectors
+        existing_size = getattr(vectors_config, "size", None)
+        if existing_size is not None and existing_size != vector_size:
+            logger.warning(
+                "Qdrant collection vector size mismatch",
+                extra={"collection": collection_name, "expected": vector_size, "actual": existing_size},
+            )
+
+    def upsert_transcript_chunks(
+        self,
+        video_id: UUID,
+        transcript_id: UUID,
+        ids: Sequence[str],
+        vectors: np.ndarray | Sequence[Sequence[float]],
+        payloads: Sequence[dict],
+        wait: bool = True,
+    ) -> None:
+        """
+        Сохраняет чанки колонками (ids / vectors / payloads) через qdrant Batch.
+
+        Векторы обязаны быть единичной длины (см. VECTOR_DISTANCE); payload каждого
+        чанка дополняется video_id и transcript_id.
 
-    def upsert_transcript_chunks(self, video_id: UUID, transcript_id: UUID, chunks: Iterable[dict]) -> None:
-        points = []
-        for chunk in chunks:
-            points.append(
-                {
-                    "id": chunk["id"],
-                    "vector": chunk["vector"],
-                    "payload": {
-                        "video_id": str(video_id),
-                        "transcript_id": str(transcript_id),
-                        "text": chunk["text"],
-                        "metadata": chunk.get("metadata", {}),
-                    },
-                }
+        Промежуточные пачки отправляются с wait=False (Qdrant подтверждает запись в WAL,
+        не дожидаясь индексации); ожидание применяется только к последней. Обновления
+        коллекции применяются по порядку, поэтому ответ на последнюю пачку с wait=True
+        означает, что применены и все предыдущие.
+        """
+        video_key = str(video_id)
+        transcript_key = str(transcript_id)
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+            end = start + UPSERT_BATCH_SIZE
+            self._client.upsert(
+                collection_name=COLLECTION_NAME,
+                points=qdrant_models.Batch(
+                    ids=list(ids[start:end]),
+                    vectors=_as_vector_rows(vectors[start:end]),
+                    payloads=[
+                        {"video_id": video_key, "transcript_id": transcript_key, **payload}
+                        for payload in payloads[start:end]
+                    ],
+                ),
+                wait=wait and end >= len(ids),
             )
-        if points:
-            self._client.upsert(collection_name=COLLECTION_NAME, points=points)
+
+    def upsert_stream(
+        self,
+        video_id: UUID,
+        transcript_id: UUID,
+        points: Iterable[tuple[str, dict]],
+        embed_fn: Callable[[list[str]], np.ndarray],
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> int:
+        """
+        Векторизует и сохраняет точки (id, payload) конвейером, не собирая их в список.
+
+        Точки читаются из ``points`` батчами по ``batch_size``; ``embed_fn`` получает
+        тексты payload["text"] батча и возвращает матрицу единичных векторов. Пока
+        батч i записывается, следующие уже векторизуются, поэтому в памяти одновременно
+        только несколько батчей, а не весь транскрипт. Последний батч отправляется
+        с wait=True после подтверждения остальных: по возврату Qdrant применил все точки.
+
+        Returns:
+            Число сохранённых точек
+
+        Raises:
+            Первую ошибку векторизации или записи
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+
+        point_iter = iter(points)
+        pending: deque[tuple[list[tuple[str, dict]], Future]] = deque()
+        upserts: deque[Future] = deque()
+        total = 0
+
+        with (
+            ThreadPoolExecutor(max_workers=STREAM_EMBED_IN_FLIGHT, thread_name_prefix="nvc-stream-embed") as embed_pool,
+            ThreadPoolExecutor(
+                max_workers=STREAM_UPSERT_CONCURRENCY,
+                thread_name_prefix="nvc-stream-upsert",
+            ) as upsert_pool,
+        ):
+
+            def submit_next_batch() -> None:
+                batch = list(itertools.islice(point_iter, batch_size))
+                if batch:
+                    texts = [payload["text"] for _, payload in batch]
+                    pending.append((batch, embed_pool.submit(embed_fn, texts)))
+
+            for _ in range(STREAM_EMBED_IN_FLIGHT):
+                submit_next_batch()
+
+            while pending:
+                batch, embeddings_future = pending.popleft()
+                embeddings = embeddings_future.result()
+                submit_next_batch()
+                is_last = not pending
+                # Завершённые записи отпускаем сразу (их ошибки пробрасываются); перед последним батчем ждём все
+                while upserts and (is_last or upserts[0].done()):
+                    upserts.popleft().result()
+                upserts.append(
+                    upsert_pool.submit(
+                        self.upsert_transcript_chunks,
+                        video_id,
+                        transcript_id,
+                        [point_id for point_id, _ in batch],
+                        embeddings,
+                        [payload for _, payload in batch],
+                        wait=is_last,
+                    )
+                )
+                total += len(batch)
+
+            while upserts:
+                upserts.popleft().result()
+
+        return total
+
+    def ensure_fingerprint_collection(self, vector_size: int) -> None:
+        """Коллекция отпечатков аудио для поиска почти дубликатов уже транскрибированных файлов."""
+        key = (FINGERPRINT_COLLECTION_NAME, vector_size)
+        if key in self._ensured:
+            return
+        with self._ensure_lock:
+            if key in self._ensured:
+                return
+            if not self._client.collection_exists(FINGERPRINT_COLLECTION_NAME):
+                self._client.create_collection(
+                    collection_name=FINGERPRINT_COLLECTION_NAME,
+                    vectors_config=qdrant_models.VectorParams(size=vector_size, distance=VECTOR_DISTANCE),
+                )
+            self._ensured.add(key)
+
+    def upsert_fingerprint(self, point_id: str, vector: np.ndarray, payload: dict) -> None:
+        self._client.upsert(
+            collection_name=FINGERPRINT_COLLECTION_NAME,
+            points=[qdrant_models.PointStruct(id=point_id, vector=vector.tolist(), payload=payload)],
+        )
+
+    def search_fingerprint(self, vector: np.ndarray, top_k: int = 1) -> list[dict]:
+        results = self._client.search(
+            collection_name=FINGERPRINT_COLLECTION_NAME,
+            query_vector=np.asarray(vector, dtype=np.float32),
+            limit=top_k,
+        )
+        return [{"score": hit.score, "payload": hit.payload} for hit in results]
 
     def delete_transcript_chunks(self, transcript_id: UUID) -> None:
         filter_selector = qdrant_models.FilterSelector(
@@ -77,10 +259,28 @@ class VectorStoreClient:
             points_selector=filter_selector,
         )
 
-    def search(self, query_vector: list[float], top_k: int = 5) -> list[dict]:
+    def search(
+        self,
+        query_vector: np.ndarray | Sequence[float],
+        top_k: int = 5,
+        video_id: str | None = None,
+    ) -> list[dict]:
+        query_filter = None
+        if video_id:
+            # Фильтр по payload применяется на стороне Qdrant: top_k — среди точек нужного видео
+            query_filter = qdrant_models.Filter(
+                must=[
+                    qdrant_models.FieldCondition(
+                        key="video_id",
+                        match=qdrant_models.MatchValue(value=video_id),
+                    )
+                ]
+            )
         results = self._client.search(
             collection_name=COLLECTION_NAME,
-            query_vector=query_vector,
+            query_vector=np.asarray(query_vector, dtype=np.float32),
+            query_filter=query_filter,
+            search_params=SEARCH_PARAMS,
             limit=top_k,
         )
         return [
@@ -91,3 +291,21 @@ class VectorStoreClient:
             for hit in results
         ]
 
+
+@functools.lru_cache(maxsize=4)
+def _get_qdrant(url: str, api_key: str | None, prefer_grpc: bool, grpc_port: int) -> QdrantClient:
+    """
+    Клиент Qdrant, общий для всех VectorStoreClient с теми же настройками.
+
+    Клиент держит пул соединений (HTTP keep-alive или gRPC-канал), поэтому создаётся
+    один раз на процесс. gRPC заметно дешевле REST на вызов и не требует сериализации
+    векторов в JSON.
+    """
+    return QdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc, grpc_port=grpc_port)
+
+
+def _as_vector_rows(vectors: np.ndarray | Sequence[Sequence[float]]) -> list[list[float]]:
+    """Batch Qdrant валидируется pydantic-моделью, которая ожидает списки чисел."""
+    if isinstance(vectors, np.ndarray):
+        return vectors.tolist()
+    return [vector.tolist() if isinstance(vector, np.ndarray) else list(vector) for vector in vectors]
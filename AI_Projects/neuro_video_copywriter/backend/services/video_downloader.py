@@ -9,8 +9,10 @@ from __future__ import annotations
 
 import dataclasses
 import logging
+import shutil
 from pathlib import Path
-from typing import Iterable, Mapping, Optional
+from typing import Iterable, Mapping, Optional, Sequence
+from urllib.parse import urlsplit
 from uuid import uuid4
 
 from .providers import (
@@ -26,6 +28,9 @@ from .storage import MediaContext, MediaLocation, MediaStorage, StorageError
 
 logger = logging.getLogger(__name__)
 
+# Фрагменты HLS/DASH качаются параллельно; адаптеры со своим значением флага (YouTube) его переопределяют
+DEFAULT_YT_DLP_ARGS = ("--concurrent-fragments", "8")
+
 
 @dataclasses.dataclass(slots=True)
 class VideoDownloadRequest:
@@ -51,18 +56,25 @@ class VideoDownloadService:
         adapters: Optional[Iterable[BaseProviderAdapter]] = None,
         workdir: Optional[Path] = None,
         yt_dlp_executable: str = DEFAULT_EXECUTABLE,
+        yt_dlp_args: Sequence[str] = DEFAULT_YT_DLP_ARGS,
     ) -> None:
         self._storage = storage
         self._workdir = workdir or Path("data/downloads")
         self._workdir.mkdir(parents=True, exist_ok=True)
         self._executable = yt_dlp_executable or DEFAULT_EXECUTABLE
+        self._executable_args = tuple(yt_dlp_args)
         self._adapters = list(adapters) if adapters else self._default_adapters()
+        # Хост → адаптер; при пересечении хостов побеждает адаптер, стоящий раньше (как при переборе)
+        self._host_map: dict[str, BaseProviderAdapter] = {}
+        for adapter in self._adapters:
+            for host in adapter.supported_hosts:
+                self._host_map.setdefault(host, adapter)
 
     def _default_adapters(self) -> list[BaseProviderAdapter]:
         return [
-            YouTubeAdapter(executable=self._executable),
-            VkAdapter(executable=self._executable),
-            RuTubeAdapter(executable=self._executable),
+            YouTubeAdapter(executable=self._executable, executable_args=self._executable_args),
+            VkAdapter(executable=self._executable, executable_args=self._executable_args),
+            RuTubeAdapter(executable=self._executable, executable_args=self._executable_args),
         ]
 
     def handle(self, request: VideoDownloadRequest) -> VideoDownloadResponse:
@@ -111,6 +123,11 @@ class VideoDownloadService:
                     return adapter
             raise ProviderError(f"No adapter for hint '{provider_hint}'")
 
+        host = (urlsplit(url).hostname or "").removeprefix("www.")
+        adapter = self._host_map.get(host)
+        if adapter is not None:
+            return adapter
+
         for adapter in self._adapters:
             if adapter.supports(url):
                 return adapter
@@ -131,14 +148,9 @@ class VideoDownloadService:
         return target_dir
 
     def _cleanup_path(self, path: Path) -> None:
-        for child in path.glob("*"):
-            try:
-                child.unlink()
-            except OSError:
-                logger.warning("Cannot remove working file", extra={"file": str(child)})
-
-        try:
-            path.rmdir()
-        except OSError:
-            logger.debug("Working directory is not empty", extra={"dir": str(path)})
+        """Удаляет рабочий каталог загрузки вместе с вложенными каталогами (фрагменты, временные файлы yt-dlp)."""
+        # rmtree обходит каталог через os.scandir и удаляет относительно дескриптора — без stat на каждый файл
+        shutil.rmtree(path, ignore_errors=True)
+        if path.exists():
+            logger.warning("Cannot remove working directory", extra={"dir": str(path)})
 
@@ -0,0 +1,112 @@
+"""
+@file: backend/tests/test_cache.py
+@description: Тесты in-process кэша StaleWhileRevalidateCache: свежесть, устаревание, версии и фоновое обновление.
+@dependencies: pytest, backend.utils.cache
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import types
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import StaleWhileRevalidateCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 50.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+def test_entry_is_fresh_then_stale_then_expired(clock):
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache(ttl=5.0, stale_ttl=30.0)
+    cache.set("videos", "page", version=1)
+
+    clock.now += 5.0
+    assert cache.get("videos", version=1) == ("page", False)
+
+    clock.now += 0.1
+    assert cache.get("videos", version=1) == ("page", True)
+
+    clock.now += 29.9
+    assert cache.get("videos", version=1) == ("page", True)
+
+    clock.now += 0.1
+    assert cache.get("videos", version=1) == (None, False)
+    # Просроченная запись удалена, а не просто скрыта
+    clock.now -= 30.0
+    assert cache.get("videos", version=1) == (None, False)
+
+
+def test_missing_key(clock):
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache()
+
+    assert cache.get("absent", version=0) == (None, False)
+
+
+def test_version_mismatch_drops_entry(clock):
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache()
+    cache.set("videos", "old page", version=1)
+
+    assert cache.get("videos", version=2) == (None, False)
+    # Запись удалена: возврат к прежней версии её не воскрешает
+    assert cache.get("videos", version=1) == (None, False)
+
+
+def test_set_refreshes_timestamp_and_version(clock):
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache(ttl=5.0, stale_ttl=30.0)
+    cache.set("videos", "old page", version=1)
+    clock.now += 10.0
+    assert cache.get("videos", version=1) == ("old page", True)
+
+    cache.set("videos", "new page", version=2)
+
+    assert cache.get("videos", version=2) == ("new page", False)
+
+
+def test_maxsize_evicts_least_recently_used(clock):
+    cache: StaleWhileRevalidateCache[int] = StaleWhileRevalidateCache(maxsize=2)
+    cache.set("a", 1, version=0)
+    cache.set("b", 2, version=0)
+    cache.get("a", version=0)
+
+    cache.set("c", 3, version=0)
+
+    assert cache.get("b", version=0) == (None, False)
+    assert cache.get("a", version=0) == (1, False)
+    assert cache.get("c", version=0) == (3, False)
+
+
+def test_begin_refresh_deduplicates_until_end_refresh():
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache()
+
+    assert cache.begin_refresh("videos") is True
+    assert cache.begin_refresh("videos") is False
+    assert cache.begin_refresh("other") is True
+
+    cache.end_refresh("videos")
+    assert cache.begin_refresh("videos") is True
+    # Повторное снятие отметки безопасно
+    cache.end_refresh("videos")
+    cache.end_refresh("videos")
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"ttl": 0}, {"stale_ttl": -1}, {"maxsize": 0}],
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        StaleWhileRevalidateCache(**kwargs)
@@ -0,0 +1,214 @@
+"""
+@file: backend/tests/test_resilience.py
+@description: Тесты circuit breaker, повторов с backoff и rate limiter на поддельных часах.
+@dependencies: pytest, backend.utils.resilience
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import asyncio
+import types
+
+import pytest
+
+from utils import resilience
+from utils.resilience import CircuitBreaker, CircuitOpenError, RateLimiter, call_with_retry, call_with_retry_async
+
+
+class FakeClock:
+    """Монотонные часы, которые двигает только тест (и sleep)."""
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds: float) -> None:
+        self.sleep(seconds)
+
+
+class TransientError(Exception):
+    pass
+
+
+class ClientError(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(resilience, "time", types.SimpleNamespace(monotonic=fake.monotonic, sleep=fake.sleep))
+    monkeypatch.setattr(resilience, "random", types.SimpleNamespace(uniform=lambda low, high: 0.0))
+    return fake
+
+
+def _fail(exc: Exception):
+    def func():
+        raise exc
+
+    return func
+
+
+def test_breaker_opens_after_fail_max_and_recovers_through_half_open(clock):
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=10.0)
+    for _ in range(3):
+        with pytest.raises(TransientError):
+            breaker.call(_fail(TransientError()))
+
+    # Разомкнут: вызов отклоняется, не доходя до функции
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: pytest.fail("must not be called while open"))
+
+    # Half-open: после таймаута пропускается пробный вызов; его ошибка снова размыкает цепь
+    clock.now += 10.0
+    with pytest.raises(TransientError):
+        breaker.call(_fail(TransientError()))
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "rejected")
+
+    # Успешная проба замыкает цепь и сбрасывает счётчик ошибок
+    clock.now += 10.0
+    assert breaker.call(lambda: "ok") == "ok"
+    for _ in range(2):
+        with pytest.raises(TransientError):
+            breaker.call(_fail(TransientError()))
+    assert breaker.call(lambda: "still closed") == "still closed"
+
+
+def test_breaker_success_resets_consecutive_failures(clock):
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=10.0)
+    with pytest.raises(TransientError):
+        breaker.call(_fail(TransientError()))
+    breaker.call(lambda: None)
+    with pytest.raises(TransientError):
+        breaker.call(_fail(TransientError()))
+
+    assert breaker.call(lambda: "closed") == "closed"
+
+
+def test_breaker_ignores_errors_rejected_by_is_failure(clock):
+    breaker = CircuitBreaker(
+        fail_max=2,
+        reset_timeout=10.0,
+        is_failure=lambda exc: isinstance(exc, TransientError),
+    )
+    for _ in range(5):
+        with pytest.raises(ClientError):
+            breaker.call(_fail(ClientError("400 Bad Request")))
+    assert breaker.call(lambda: "closed") == "closed"
+
+    for _ in range(2):
+        with pytest.raises(TransientError):
+            breaker.call(_fail(TransientError()))
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: None)
+
+
+def test_breaker_client_error_on_probe_closes_circuit(clock):
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=10.0, is_failure=lambda exc: isinstance(exc, TransientError))
+    with pytest.raises(TransientError):
+        breaker.call(_fail(TransientError()))
+    clock.now += 10.0
+
+    # API ответил (пусть и 4xx) — сервис доступен, цепь замыкается
+    with pytest.raises(ClientError):
+        breaker.call(_fail(ClientError()))
+    assert breaker.call(lambda: "closed") == "closed"
+
+
+def test_call_with_retry_stops_after_max_attempts(clock):
+    calls = []
+
+    def func():
+        calls.append(clock.now)
+        raise TransientError()
+
+    with pytest.raises(TransientError):
+        call_with_retry(func, is_retryable=lambda exc: True, max_attempts=4, initial_delay=1.0, max_delay=3.0)
+
+    assert len(calls) == 4
+    assert clock.sleeps == [1.0, 2.0, 3.0]
+
+
+def test_call_with_retry_does_not_retry_permanent_errors(clock):
+    calls = []
+
+    def func():
+        calls.append(1)
+        raise ClientError()
+
+    with pytest.raises(ClientError):
+        call_with_retry(func, is_retryable=lambda exc: isinstance(exc, TransientError), max_attempts=4)
+
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_call_with_retry_returns_first_success(clock):
+    outcomes = iter([TransientError(), TransientError(), "done"])
+
+    def func():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_retry(func, is_retryable=lambda exc: True, max_attempts=5) == "done"
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_call_with_retry_async_stops_after_max_attempts(clock, monkeypatch):
+    monkeypatch.setattr(resilience, "asyncio", types.SimpleNamespace(sleep=clock.async_sleep))
+    calls = []
+
+    async def func():
+        calls.append(1)
+        raise TransientError()
+
+    with pytest.raises(TransientError):
+        asyncio.run(call_with_retry_async(func, is_retryable=lambda exc: True, max_attempts=3))
+
+    assert len(calls) == 3
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_rate_limiter_paces_requests_after_burst(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+
+    # Полный bucket пропускает 60 запросов сразу, дальше — по одному в секунду
+    assert [limiter.reserve() for _ in range(60)] == [0.0] * 60
+    assert limiter.reserve() == pytest.approx(1.0)
+    assert limiter.reserve() == pytest.approx(2.0)
+
+    clock.now += 2.0
+    assert limiter.reserve() == pytest.approx(1.0)
+
+
+def test_rate_limiter_units_budget_and_acquire_sleeps(clock):
+    limiter = RateLimiter(units_per_minute=600)
+
+    limiter.acquire(units=600)
+    assert clock.sleeps == []
+
+    # 300 единиц при пополнении 10 ед./с — ждать 30 секунд
+    limiter.acquire(units=300)
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+    # Запрос крупнее ёмкости списывает не больше ёмкости и всё же проходит
+    clock.now += 60.0
+    assert limiter.reserve(units=10_000) == pytest.approx(0.0)
+
+
+def test_rate_limiter_delay_is_max_of_both_limits(clock):
+    limiter = RateLimiter(requests_per_minute=60, units_per_minute=60)
+    limiter.reserve(units=60)
+
+    assert limiter.reserve(units=30) == pytest.approx(30.0)
@@ -0,0 +1,104 @@
+"""
+@file: backend/tests/test_transcription_cache.py
+@description: Тесты дискового кэша транскриптов: чтение/запись, TTL, вытеснение по размеру и ключи.
+@dependencies: pytest, backend.services.transcription_cache
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import json
+import types
+
+import pytest
+
+from services import transcription_cache
+from services.transcription_cache import TranscriptionCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(transcription_cache, "time", types.SimpleNamespace(time=fake.time))
+    return fake
+
+
+def _entry_size(value: dict) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def test_get_returns_stored_value(tmp_path, clock):
+    cache = TranscriptionCache(tmp_path)
+    value = {"text": "Привет, мир", "segments": [{"start": 0.0, "end": 1.5}]}
+
+    cache.set("key", value)
+
+    assert cache.get("key") == value
+    assert cache.get("missing") is None
+    cache.close()
+
+
+def test_entry_expires_after_ttl(tmp_path, clock):
+    cache = TranscriptionCache(tmp_path, ttl_seconds=60)
+    cache.set("key", {"text": "a"})
+
+    clock.advance(59)
+    assert cache.get("key") == {"text": "a"}
+
+    clock.advance(2)
+    assert cache.get("key") is None
+    cache.close()
+
+
+def test_size_limit_evicts_least_recently_read(tmp_path, clock):
+    value = {"text": "x" * 100}
+    cache = TranscriptionCache(tmp_path, size_limit_bytes=3 * _entry_size(value))
+    for key in ("a", "b", "c"):
+        cache.set(key, value)
+        clock.advance(1)
+
+    # Чтение обновляет accessed_at: первой вытесняется "b", а не самая старая по записи "a"
+    assert cache.get("a") == value
+    clock.advance(1)
+    cache.set("d", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert cache.get("d") == value
+    cache.close()
+
+
+def test_key_depends_on_content_and_options(tmp_path, clock):
+    first = tmp_path / "first.mp3"
+    copy = tmp_path / "copy.mp3"
+    other = tmp_path / "other.mp3"
+    first.write_bytes(b"audio" * 1000)
+    copy.write_bytes(b"audio" * 1000)
+    other.write_bytes(b"other" * 1000)
+    options = {"model": "whisper-1", "language": "ru"}
+    cache = TranscriptionCache(tmp_path / "cache")
+
+    cache.set(TranscriptionCache.make_key(first, "api", options), {"text": "hit"})
+
+    assert cache.get(TranscriptionCache.make_key(copy, "api", options)) == {"text": "hit"}
+    assert cache.get(TranscriptionCache.make_key(copy, "api", {**options, "language": "en"})) is None
+    assert cache.get(TranscriptionCache.make_key(copy, "local", options)) is None
+    assert cache.get(TranscriptionCache.make_key(other, "api", options)) is None
+    cache.close()
+
+
+def test_options_digest_ignores_key_order():
+    assert TranscriptionCache.options_digest({"a": 1, "b": 2}) == TranscriptionCache.options_digest({"b": 2, "a": 1})
+    assert TranscriptionCache.options_digest({"a": 1}) != TranscriptionCache.options_digest({"a": 2})
@@ -0,0 +1,84 @@
+"""
+@file: backend/utils/cache.py
+@description: Небольшой in-process кэш с TTL и семантикой stale-while-revalidate.
+@dependencies: threading, time, collections
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+ValueT = TypeVar("ValueT")
+
+
+class StaleWhileRevalidateCache(Generic[ValueT]):
+    """
+    LRU-кэш с временем жизни записей.
+
+    Запись считается свежей в течение ``ttl`` секунд, затем ещё ``stale_ttl``
+    секунд может отдаваться как устаревшая (вызывающий код обновляет её в фоне).
+    Каждая запись помечается версией данных: при несовпадении версии запись
+    считается отсутствующей.
+    """
+
+    def __init__(self, ttl: float = 5.0, stale_ttl: float = 30.0, maxsize: int = 64) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        if stale_ttl < 0:
+            raise ValueError("stale_ttl must be non-negative")
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[ValueT, float, int]] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> tuple[Optional[ValueT], bool]:
+        """
+        Возвращает (значение, устарело ли оно).
+
+        Значение равно None, если записи нет, она слишком старая или версия данных изменилась.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            value, stored_at, entry_version = entry
+            age = time.monotonic() - stored_at
+            if entry_version != version or age > self._ttl + self._stale_ttl:
+                del self._entries[key]
+                return None, False
+            self._entries.move_to_end(key)
+            return value, age > self._ttl
+
+    def set(self, key: Hashable, value: ValueT, version: int) -> None:
+        """Сохраняет значение с текущей отметкой времени."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, key: Hashable) -> bool:
+        """Помечает ключ как обновляемый; False, если обновление уже идёт."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: Hashable) -> None:
+        """Снимает отметку фонового обновления ключа."""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,28 @@
+"""
+@file: backend/utils/json_codec.py
+@description: Разбор JSON через orjson (если установлен) с откатом на стандартный json.
+@dependencies: orjson (опционально), json
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def loads(data: str | bytes) -> Any:
+    """
+    Разбирает JSON-документ из строки или байтов (UTF-8).
+
+    orjson принимает bytes без предварительного декодирования; его ошибка разбора —
+    подкласс json.JSONDecodeError, так что обработчики вызывающего кода не меняются.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
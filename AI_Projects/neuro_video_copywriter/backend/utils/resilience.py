@@ -0,0 +1,196 @@
+"""
+@file: backend/utils/resilience.py
+@description: Повтор вызовов с экспоненциальной задержкой, circuit breaker и упреждающий rate limiter для внешних API.
+@dependencies: asyncio, threading, time, random
+@created: 2026-10-17
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+ResultT = TypeVar("ResultT")
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонён: circuit breaker разомкнут после серии ошибок."""
+
+    pass
+
+
+class CircuitBreaker:
+    """
+    Потокобезопасный circuit breaker.
+
+    После ``fail_max`` ошибок подряд вызовы отклоняются ``CircuitOpenError`` в течение
+    ``reset_timeout`` секунд; затем пропускается один пробный вызов (half-open):
+    успех замыкает цепь, ошибка — снова размыкает.
+
+    ``is_failure`` отбирает ошибки, которые считаются сбоем сервиса; остальные (например,
+    400 на некорректный запрос) означают, что сервис ответил, и засчитываются как успех.
+    """
+
+    def __init__(
+        self,
+        fail_max: int = 10,
+        reset_timeout: float = 60.0,
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+    ) -> None:
+        if fail_max <= 0:
+            raise ValueError("fail_max must be positive")
+        if reset_timeout <= 0:
+            raise ValueError("reset_timeout must be positive")
+        self._fail_max = fail_max
+        self._reset_timeout = reset_timeout
+        self._is_failure = is_failure
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[[], ResultT]) -> ResultT:
+        self._before_call()
+        try:
+            result = func()
+        except Exception as exc:
+            if self._is_failure is None or self._is_failure(exc):
+                self._on_failure()
+            else:
+                self._on_success()
+            raise
+        self._on_success()
+        return result
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self._reset_timeout or self._probe_in_flight:
+                raise CircuitOpenError("Circuit is open, call rejected")
+            self._probe_in_flight = True
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self._fail_max:
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+def call_with_retry(
+    func: Callable[[], ResultT],
+    is_retryable: Callable[[BaseException], bool],
+    max_attempts: int = 6,
+    initial_delay: float = 1.0,
+    max_delay: float = 30.0,
+) -> ResultT:
+    """
+    Вызывает ``func``, повторяя при ошибках, для которых ``is_retryable`` вернул True.
+
+    Задержка растёт экспоненциально (initial_delay · 2^n, не более max_delay)
+    плюс случайная добавка до initial_delay, чтобы параллельные клиенты не повторяли синхронно.
+    """
+    attempt = 1
+    while True:
+        try:
+            return func()
+        except Exception as exc:
+            if attempt >= max_attempts or not is_retryable(exc):
+                raise
+            time.sleep(_backoff_delay(attempt, initial_delay, max_delay))
+            attempt += 1
+
+
+async def call_with_retry_async(
+    func: Callable[[], Awaitable[ResultT]],
+    is_retryable: Callable[[BaseException], bool],
+    max_attempts: int = 6,
+    initial_delay: float = 1.0,
+    max_delay: float = 30.0,
+) -> ResultT:
+    """Асинхронный вариант call_with_retry: ``func`` создаёт новую корутину на каждую попытку."""
+    attempt = 1
+    while True:
+        try:
+            return await func()
+        except Exception as exc:
+            if attempt >= max_attempts or not is_retryable(exc):
+                raise
+            await asyncio.sleep(_backoff_delay(attempt, initial_delay, max_delay))
+            attempt += 1
+
+
+def _backoff_delay(attempt: int, initial_delay: float, max_delay: float) -> float:
+    return min(initial_delay * 2 ** (attempt - 1), max_delay) + random.uniform(0, initial_delay)
+
+
+class _TokenBucket:
+    """Bucket ёмкостью ``per_minute`` единиц, равномерно пополняемый за минуту; баланс может уходить в долг."""
+
+    __slots__ = ("_capacity", "_rate", "_tokens", "_updated_at")
+
+    def __init__(self, per_minute: float) -> None:
+        if per_minute <= 0:
+            raise ValueError("Rate limit must be positive")
+        self._capacity = float(per_minute)
+        self._rate = self._capacity / 60.0
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Списывает ``amount`` и возвращает, сколько секунд ждать, пока баланс не станет неотрицательным."""
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+        # Запрос крупнее ёмкости иначе не прошёл бы никогда
+        self._tokens -= min(amount, self._capacity)
+        return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+
+class RateLimiter:
+    """
+    Упреждающий лимит запросов к API: запросы в минуту и «объём» в минуту (например, секунды аудио).
+
+    Слот резервируется до отправки запроса, а не после ответа 429. Состояние защищено
+    threading.Lock и не привязано к event loop, поэтому один лимитер делят потоки и
+    разные вызовы asyncio.run().
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        units_per_minute: Optional[float] = None,
+    ) -> None:
+        self._requests = _TokenBucket(requests_per_minute) if requests_per_minute is not None else None
+        self._units = _TokenBucket(units_per_minute) if units_per_minute is not None else None
+        self._lock = threading.Lock()
+
+    def reserve(self, units: float = 0.0) -> float:
+        """Резервирует один запрос и ``units`` единиц объёма; возвращает задержку перед отправкой в секундах."""
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self._requests is not None:
+                delay = self._requests.reserve(1.0, now)
+            if self._units is not None and units > 0:
+                delay = max(delay, self._units.reserve(units, now))
+            return delay
+
+    def acquire(self, units: float = 0.0) -> None:
+        delay = self.reserve(units)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, units: float = 0.0) -> None:
+        delay = self.reserve(units)
+        if delay > 0:
+            await asyncio.sleep(delay)